@@ -0,0 +1,309 @@
+"""
+Batch mode of Schaeffler_diagram_find_filler_material: reads a job file
+(pairs of base metals, dilutions and the ferrite content we aim for) line by
+line, ranks all fillers of a catalog for every job and writes the results
+as they are calculated. The jobs are evaluated in chunks, so the memory does
+not grow with the length of the job file.
+
+A CSV job file has the columns base1, base2, dilutions (separated by ";")
+and ferrite, for example
+
+    base1,base2,dilutions,ferrite
+    1.4021,1.4723,25;30,10
+
+A JSONL job file has one job per line, base1 and base2 can be names or
+metal_dicts:
+
+    {"base1": "1.4021", "base2": "1.4723", "dilutions": [25, 30], "ferrite": 10}
+
+Example:
+
+    python Schaeffler_batch.py jobs.csv --output ranking.csv --top 3
+
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+
+import Schaeffler_diagram_find_filler_material as schaeffler
+
+
+RESULT_FIELDS = ["job", "base1", "base2", "ferrite", "dilution", "rank", "filler",
+                 "distance", "Cr_eq", "Ni_eq"]
+
+
+def read_metal_dicts(path):
+    """
+    Reads metal_dicts from a JSON file (a list of dicts), a JSONL file (one
+    dict per line) or a CSV file (a column name and one column per element).
+    """
+    with open(path, newline="") as file:
+        if path.endswith(".csv"):
+            return [{key: value if key == "name" else float(value)
+                     for key, value in row.items() if value not in (None, "")}
+                    for row in csv.DictReader(file)]
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in file if line.strip()]
+        return json.load(file)
+
+
+def load_metals(bases=None, fillers=None, database=None):
+    """
+    The base metals and fillers of the command line tools: the built-in
+    metals, updated from an AlloyDatabase file (database) and from metal_dict
+    files (bases in addition, fillers instead). Returns the base metals as
+    a dict by name (every built-in metal, fillers included, can be a base
+    metal) and the list of filler metal_dicts.
+    """
+    base_metals = {schaeffler.get_value(metal_dict, "name"): metal_dict
+                   for metal_dict in schaeffler.BASE_METALS + schaeffler.FILLERS}
+    filler_dicts = schaeffler.FILLERS
+    if database is not None:
+        with schaeffler.AlloyDatabase(database) as alloy_database:
+            base_metals.update({name: alloy_database.get(name) for name in alloy_database.names()})
+            filler_dicts = alloy_database.query(kind="filler")
+    if bases is not None:
+        base_metals.update({schaeffler.get_value(metal_dict, "name"): metal_dict
+                            for metal_dict in read_metal_dicts(bases)})
+    if fillers is not None:
+        filler_dicts = read_metal_dicts(fillers)
+    return base_metals, filler_dicts
+
+
+def read_jobs(file, file_format):
+    """
+    Yields the jobs of an open job file one by one as dicts with base1,
+    base2, dilutions (list of floats) and ferrite, and the filler if the
+    file names one (Schaeffler_report.py shows it).
+    """
+    if file_format == "csv":
+        for row in csv.DictReader(file):
+            job = {"base1": row["base1"], "base2": row["base2"],
+                   "dilutions": [float(value) for value in row["dilutions"].split(";")],
+                   "ferrite": float(row["ferrite"])}
+            if row.get("filler"):
+                job["filler"] = row["filler"]
+            yield job
+    else:
+        for line in file:
+            if line.strip():
+                job = json.loads(line)
+                dilutions = job["dilutions"]
+                job["dilutions"] = [float(value) for value in
+                                    (dilutions if isinstance(dilutions, list) else [dilutions])]
+                job["ferrite"] = float(job["ferrite"])
+                yield job
+
+
+def chunks(iterable, size):
+    """Yields lists of up to size items of an iterable."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BatchRanker:
+    """
+    Ranks the fillers of a catalog for chunks of jobs, like find_best_filler
+    does for one pair and one dilution, but all at once. The distance of a
+    weld metal point to the ferrite line is measured to the segments of the
+    line, like in screen_pairs_fillers.
+
+    Parameters
+    ----------
+    base_metals : TYPE dict
+        DESCRIPTION. name as key and metal_dict as value, the base metals
+                     jobs can refer to by name
+    filler_dicts : TYPE list
+        DESCRIPTION. the metal_dicts of the fillers
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. the diagram (or its registered name), its iso-ferrite
+                     lines are the ferrite targets of the jobs
+    top : TYPE int
+        DESCRIPTION. number of fillers reported per job and dilution
+
+    """
+
+    def __init__(self, base_metals, filler_dicts, diagram="Schaeffler", top=3):
+        self.diagram = schaeffler.get_diagram(diagram)
+        self.base_metals = base_metals
+        self.filler_catalog = schaeffler.AlloyCatalog.from_dicts(filler_dicts)
+        self.filler_names = np.asarray(self.filler_catalog.names, dtype=object)
+        self.filler_points = self.diagram.equivalent_points(self.filler_catalog)
+        self.top = min(top, len(self.filler_names))
+        self._base_points = {}
+
+    def _point(self, base):
+        if isinstance(base, dict):
+            return self.diagram.equivalents(base)
+        try:
+            return self._base_points[base]
+        except KeyError:
+            if base not in self.base_metals:
+                raise KeyError(f"unknown base metal {base!r}") from None
+            point = self._base_points[base] = self.diagram.equivalents(self.base_metals[base])
+            return point
+
+    def rank(self, jobs, first_job=0):
+        """
+        Ranks the fillers for a list of jobs.
+
+        Parameters
+        ----------
+        jobs : TYPE list
+            DESCRIPTION. jobs as yielded by read_jobs
+        first_job : TYPE int
+            DESCRIPTION. number of the first job, for the job column
+
+        Returns
+        -------
+        TYPE list
+            DESCRIPTION. result rows (lists of the values of RESULT_FIELDS),
+                         top rows per job and dilution
+
+        """
+        # one row per job and dilution
+        job_numbers = np.array([k for k, job in enumerate(jobs) for _ in job["dilutions"]])
+        dilutions = np.array([dilution for job in jobs for dilution in job["dilutions"]])
+        targets = np.array([jobs[k]["ferrite"] for k in job_numbers])
+        base_points = []
+        for k, job in enumerate(jobs):
+            if job["ferrite"] not in self.diagram.iso_lines:
+                raise ValueError(f"job {first_job + k}: no {job['ferrite']:g}{self.diagram.ferrite_unit} line "
+                                 f"in the {self.diagram.name} diagram, available are "
+                                 f"{sorted(self.diagram.iso_lines)}")
+            try:
+                base_points.append([self._point(job["base1"]), self._point(job["base2"])])
+            except KeyError as error:
+                raise KeyError(f"job {first_job + k}: {error.args[0]}") from None
+        base_points = np.array(base_points)
+        instrumentation = schaeffler.INSTRUMENTATION
+        instrumentation.count("jobs", len(jobs))
+        with instrumentation.stage("dilution points"):
+            mix50_points = schaeffler.mix_point_arrays(base_points[:, 0], base_points[:, 1], 50)
+            points = schaeffler.mix_point_arrays(mix50_points[job_numbers][:, None, :],
+                                                 self.filler_points[None, :, :], dilutions[:, None])
+        with instrumentation.stage("distance"):
+            distances = np.empty(points.shape[:2])
+            for target in np.unique(targets):
+                rows = targets == target
+                _, _, target_distances = self.diagram.segments(target).nearest(points[rows].reshape(-1, 2))
+                distances[rows] = target_distances.reshape(-1, len(self.filler_points))
+        with instrumentation.stage("ranking"):
+            order, _ = schaeffler.top_k_fillers(distances, self.top, axis=1)
+        rows = np.arange(len(order))[:, None]
+        names = self.filler_names[order].tolist()
+        best_distances = distances[rows, order].tolist()
+        cr_values = points[rows, order, 0].tolist()
+        ni_values = points[rows, order, 1].tolist()
+        results = []
+        for row, k in enumerate(job_numbers.tolist()):
+            job = jobs[k]
+            prefix = [first_job + k, self._name(job["base1"]), self._name(job["base2"]),
+                      job["ferrite"], float(dilutions[row])]
+            for rank in range(len(names[row])):
+                results.append(prefix + [rank + 1, names[row][rank], best_distances[row][rank],
+                                         cr_values[row][rank], ni_values[row][rank]])
+        return results
+
+    @staticmethod
+    def _name(base):
+        return schaeffler.get_value(base, "name") if isinstance(base, dict) else base
+
+
+class ResultWriter:
+    """Writes result rows to an open file as CSV or JSONL."""
+
+    def __init__(self, file, file_format):
+        self.file = file
+        self.file_format = file_format
+        if file_format == "csv":
+            self.writer = csv.writer(file)
+            self.writer.writerow(RESULT_FIELDS)
+
+    def write(self, rows):
+        if self.file_format == "csv":
+            self.writer.writerows(rows)
+        else:
+            self.file.writelines(json.dumps(dict(zip(RESULT_FIELDS, row))) + "\n" for row in rows)
+        self.file.flush()
+
+
+def file_format_of(path, file_format):
+    """The given format, or csv/jsonl from the file extension."""
+    if file_format is not None:
+        return file_format
+    return "csv" if path.endswith(".csv") else "jsonl"
+
+
+def run(args):
+    """Runs the batch for parsed command line arguments."""
+    base_metals, filler_dicts = load_metals(args.bases, args.fillers, args.database)
+    ranker = BatchRanker(base_metals, filler_dicts, args.diagram, args.top)
+
+    jobs_file = sys.stdin if args.jobs == "-" else open(args.jobs, newline="")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        writer = ResultWriter(output_file, file_format_of(args.output, args.output_format))
+        jobs = read_jobs(jobs_file, file_format_of(args.jobs, args.jobs_format))
+        start = time.perf_counter()
+        done = 0
+        for chunk in chunks(jobs, args.chunk_size):
+            rows = ranker.rank(chunk, done)
+            with schaeffler.INSTRUMENTATION.stage("output"):
+                writer.write(rows)
+            done += len(chunk)
+            if not args.quiet:
+                elapsed = time.perf_counter() - start
+                print(f"\r{done} jobs, {done / elapsed:.0f} jobs/s", end="", file=sys.stderr, flush=True)
+        if not args.quiet:
+            elapsed = time.perf_counter() - start
+            print(f"\r{done} jobs in {elapsed:.2f} s, {done / max(elapsed, 1e-9):.0f} jobs/s",
+                  file=sys.stderr)
+    finally:
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank filler materials for many pairs of base metals.")
+    parser.add_argument("jobs", help="job file (.csv or .jsonl), - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="result file (.csv or .jsonl), default stdout")
+    parser.add_argument("--jobs-format", choices=["csv", "jsonl"], help="format of the job file")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="format of the result file")
+    parser.add_argument("--bases", help="base metals (.json, .jsonl or .csv), in addition to the built-in ones")
+    parser.add_argument("--fillers", help="fillers (.json, .jsonl or .csv) instead of the built-in ones")
+    parser.add_argument("--database", help="AlloyDatabase file with the base metals and fillers")
+    parser.add_argument("--diagram", default="Schaeffler", help="registered diagram, default Schaeffler")
+    parser.add_argument("--top", type=int, default=3, help="fillers per job and dilution, default 3")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="jobs per chunk, default 1024")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress report")
+    parser.add_argument("--stats", help="write stage times and counters to this file (.json or text), - for stderr")
+    parser.add_argument("--profile", action="store_true", help="with --stats, add a cProfile summary")
+    args = parser.parse_args(argv)
+    if args.stats is not None:
+        schaeffler.INSTRUMENTATION.enable(profile=args.profile)
+    try:
+        run(args)
+    except (KeyError, ValueError) as error:
+        # unknown base metal or ferrite target without an iso-ferrite line
+        parser.error(error.args[0] if error.args else str(error))
+    if args.stats is not None:
+        schaeffler.INSTRUMENTATION.disable()
+        schaeffler.INSTRUMENTATION.dump(None if args.stats == "-" else args.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Benchmark of the screening pipeline of Schaeffler_diagram_find_filler_material.
+Synthetic filler catalogs (10 ... 1,000,000 fillers) are screened for one pair
+of base metals against curves of different densities. Every stage is timed:
+
+    import           importing the module in a new interpreter (the startup
+                     budget, see --import-budget), matplotlib must not be
+                     imported with it; otherwise the exit status is 1
+    equivalents      equivalent_points of the catalog
+    dilution points  screen_pairs_fillers, weld metal at all WELD_DILUTIONS
+    weld_steels_filler   results_dict of the checked fillers, one call each
+    distance         distances of all weld metal points to the curve
+    ranking          best filler of every dilution
+    find_best_filler     best of the checked fillers for 25% dilution, with a
+                         results_dict (dict) and with a WeldResultStore (store)
+    rendering        plot_metal_points and drawing the figure (Agg)
+    incremental      IncrementalScreen after a copy of the best filler is
+                     moved and moved back, checked against a full
+                     screen_pairs_fillers
+
+and checked against the reference functions (Cr_equivalent, Ni_equivalent,
+weld_steels_filler, find_min_distance_point_to_curve) on the first fillers of
+the catalog. find_min_distance_point_to_curve only knows the vertices of a
+curve, so it gets the curve with a vertex every REFERENCE_SPACING; the error
+of the distance can then be up to half of REFERENCE_SPACING. Distance and ranking are skipped where the number of
+point/segment combinations exceeds --max-pairs. The results are written as
+JSON, a second run can be compared with an earlier one:
+
+    python Schaeffler_benchmark.py --output before.json
+    python Schaeffler_benchmark.py --output after.json --compare before.json
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import Schaeffler_diagram_find_filler_material as schaeffler
+
+
+# ranges of the synthetic fillers in weight %
+ELEMENT_RANGES = {"C": (0.0, 0.3), "Si": (0.0, 1.2), "Mn": (0.0, 2.5), "Cr": (0.0, 30.0),
+                  "Ni": (0.0, 20.0), "Mo": (0.0, 4.0), "Nb": (0.0, 1.0)}
+
+
+def synthetic_catalog(size, seed=0):
+    """An AlloyCatalog of size random fillers within ELEMENT_RANGES."""
+    rng = np.random.default_rng(seed)
+    columns = {element: rng.uniform(low, high, size) for element, (low, high) in ELEMENT_RANGES.items()}
+    return schaeffler.AlloyCatalog([f"filler{k}" for k in range(size)], columns)
+
+
+def resample_curve(curve, points):
+    """The curve with points vertices, evenly spaced along its length."""
+    curve = np.asarray(curve, dtype=float)
+    lengths = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(curve, axis=0).T))))
+    positions = np.linspace(0, lengths[-1], points)
+    return np.column_stack((np.interp(positions, lengths, curve[:, 0]),
+                            np.interp(positions, lengths, curve[:, 1]))).tolist()
+
+
+# distance of the vertices of the reference curve of the distance check
+REFERENCE_SPACING = 0.05
+
+
+def densify_curve(curve, spacing):
+    """The curve with additional vertices on its segments, at most spacing apart."""
+    curve = np.asarray(curve, dtype=float)
+    vertices = []
+    for start, end in zip(curve[:-1], curve[1:]):
+        steps = max(1, int(np.ceil(np.hypot(*(end - start)) / spacing)))
+        vertices.extend(start + (end - start) * (np.arange(steps)[:, None] / steps))
+    vertices.append(curve[-1])
+    return np.array(vertices).tolist()
+
+
+def timed(function, *args, repeat=1):
+    """Returns the result of function(*args) and the best time of repeat calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def git_commit():
+    """The current commit of the repository, None outside of git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def import_time(repeat):
+    """
+    The best time of repeat imports of the module in new interpreters, and
+    whether matplotlib was imported with it.
+    """
+    script = ("import sys, time\n"
+              "start = time.perf_counter()\n"
+              "import Schaeffler_diagram_find_filler_material\n"
+              "print(time.perf_counter() - start, 'matplotlib' in sys.modules)")
+    best = float("inf")
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        best = min(best, float(output[0]))
+    return best, output[1] == "True"
+
+
+def benchmark_size(size, curve_densities, check, render_limit, repeat, seed, max_pairs):
+    """Runs all stages for one catalog size, returns the result records."""
+    records = []
+
+    def record(stage, seconds, items, curve_points=None, max_error=None):
+        records.append({"size": size, "stage": stage, "curve_points": curve_points, "seconds": seconds,
+                        "items": items, "us_per_item": None if seconds is None else seconds / items * 1e6,
+                        "max_error": max_error})
+
+    catalog = synthetic_catalog(size, seed)
+    checked = min(check, size)
+    reference_dicts = [catalog.to_dict(name) for name in catalog.names[:checked]]
+
+    points, seconds = timed(schaeffler.equivalent_points, catalog, repeat=repeat)
+    reference = np.array([[schaeffler.Cr_equivalent(metal_dict), schaeffler.Ni_equivalent(metal_dict)]
+                          for metal_dict in reference_dicts])
+    record("equivalents", seconds, size, max_error=float(np.abs(points[:checked] - reference).max()))
+
+    base_catalog = schaeffler.AlloyCatalog.from_dicts([schaeffler.steel_14021_avg_dict,
+                                                       schaeffler.steel_14723_avg_dict])
+    screening, seconds = timed(schaeffler.screen_pairs_fillers, base_catalog, catalog,
+                               schaeffler.WELD_DILUTIONS, repeat=repeat)
+
+    def weld_reference():
+        return {schaeffler.get_value(metal_dict, "name"):
+                schaeffler.weld_steels_filler(schaeffler.steel_14021_avg_dict, schaeffler.steel_14723_avg_dict,
+                                              metal_dict, plot=False)
+                for metal_dict in reference_dicts}
+
+    results_dict, reference_seconds = timed(weld_reference, repeat=repeat)
+    reference = np.array([results_points[1:] for results_points in results_dict.values()])
+    record("dilution points", seconds, screening.points[0].size // 2,
+           max_error=float(np.abs(screening.points[0, :checked] - reference).max()))
+    if checked:
+        record("weld_steels_filler", reference_seconds, checked)
+    results_store = schaeffler.WeldResultStore(capacity=checked)
+    for name, results_points in results_dict.items():
+        results_store[name] = results_points
+
+    for curve_points in curve_densities:
+        curve = resample_curve(schaeffler.ferrite_10_percent_line, curve_points)
+        if checked:
+            (best_key, result), seconds = timed(schaeffler.find_best_filler, results_dict, curve, 25,
+                                                repeat=repeat)
+            record("find_best_filler", seconds, checked, curve_points)
+            (store_key, store_result), seconds = timed(schaeffler.find_best_filler, results_store, curve, 25,
+                                                       repeat=repeat)
+            error = abs(store_result[2] - result[2]) if store_key == best_key else float("inf")
+            record("find_best_filler store", seconds, checked, curve_points, error)
+        if screening.points[0].size // 2 * (curve_points - 1) > max_pairs:
+            record("distance", None, screening.points[0].size // 2, curve_points)
+            record("ranking", None, screening.points[0].size // 2, curve_points)
+            continue
+        segments = schaeffler.CurveSegments(curve)
+        distances, seconds = timed(screening.distances, segments, repeat=repeat)
+        reference_curve = densify_curve(curve, REFERENCE_SPACING)
+        reference = np.array([[schaeffler.find_min_distance_point_to_curve(reference_curve, point)[2]
+                               for point in filler_points]
+                              for filler_points in screening.points[0, :checked].tolist()])
+        record("distance", seconds, distances.size, curve_points,
+               float(np.abs(distances[0, :checked] - reference).max()))
+
+        (_, _, best_distances), seconds = timed(screening.best_fillers, [segments], repeat=repeat)
+        # the best of the checked fillers can not be better than the best of all
+        error = float(np.maximum(best_distances[0, 0] - reference.min(axis=0), 0).max())
+        record("ranking", seconds, distances.size, curve_points, error)
+
+    checked_dicts = reference_dicts + [dict(metal_dict) for metal_dict in reference_dicts[:1]]
+    if checked_dicts:
+        base_dicts = [schaeffler.steel_14021_avg_dict, schaeffler.steel_14723_avg_dict]
+        incremental = schaeffler.IncrementalScreen(base_dicts, reference_dicts, [10])
+        # a copy of the best filler ties with it, moving the copy away and
+        # back must give the original filler again
+        best = incremental.filler_names[incremental.best_index[0, 0, 0]]
+        copy = dict(catalog.to_dict(best), name="copy")
+        moved = dict(copy, Cr=copy.get("Cr", 0.0) + 2.0)
+
+        def edit():
+            incremental.set_filler(copy)
+            incremental.set_filler(moved)
+            incremental.set_filler(copy)
+
+        _, seconds = timed(edit, repeat=repeat)
+        checked_dicts[-1] = copy
+        full_best = schaeffler.screen_pairs_fillers(base_catalog, schaeffler.AlloyCatalog.from_dicts(checked_dicts),
+                                                    schaeffler.WELD_DILUTIONS, diagram="Schaeffler").best_fillers([10])
+        error = float(max(np.count_nonzero(full_best[0] != incremental.best_index),
+                          np.abs(full_best[2] - incremental.best_distances).max()))
+        record("incremental", seconds, 3, max_error=error)
+
+    rendered = min(size, render_limit)
+    if rendered:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        def render():
+            figure = plt.figure()
+            schaeffler.plot_metal_points(screening.points[0, :rendered, 0].tolist())
+            figure.canvas.draw()
+            artists = len(figure.axes[0].get_children())
+            plt.close(figure)
+            return artists
+
+        _, seconds = timed(render, repeat=repeat)
+        record("rendering", seconds, rendered)
+    return records
+
+
+def compare(records, earlier_records):
+    """Prints the time of every stage relative to an earlier run."""
+    earlier = {(record["size"], record["stage"], record["curve_points"]): record["seconds"]
+               for record in earlier_records}
+    for record in records:
+        key = (record["size"], record["stage"], record["curve_points"])
+        if record["seconds"] is not None and earlier.get(key) is not None:
+            ratio = record["seconds"] / earlier[key]
+            print(f"{record['size']:>9} {record['stage']:<22} {record['curve_points'] or '':>6} "
+                  f"{ratio:6.2f}x {'slower' if ratio > 1.1 else 'faster' if ratio < 0.9 else ''}",
+                  file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of the filler screening pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000, 1000000],
+                        help="catalog sizes, default 10 ... 1000000")
+    parser.add_argument("--curve-points", type=int, nargs="+", default=[43, 430, 4300],
+                        help="vertices of the curve, default 43 (as digitized), 430, 4300")
+    parser.add_argument("--check", type=int, default=200, help="fillers checked against the reference")
+    parser.add_argument("--render-limit", type=int, default=10000, help="most fillers rendered")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of repeat runs is reported")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic catalogs")
+    parser.add_argument("--max-pairs", type=float, default=5e8,
+                        help="most point/segment combinations of the distance stage, default 5e8")
+    parser.add_argument("--import-budget", type=float, default=300,
+                        help="startup budget of the import in ms, default 300")
+    parser.add_argument("--output", default="-", help="JSON result file, default stdout")
+    parser.add_argument("--compare", help="JSON result file of an earlier run")
+    args = parser.parse_args(argv)
+
+    seconds, matplotlib_imported = import_time(args.repeat)
+    records = [{"size": 0, "stage": "import", "curve_points": None, "seconds": seconds, "items": 1,
+                "us_per_item": seconds * 1e6, "max_error": None}]
+    print(f"{'':>9} {'import':<22} {'':>6} {seconds * 1000:10.3f} ms", file=sys.stderr, flush=True)
+    startup_failed = False
+    if seconds * 1000 > args.import_budget:
+        print(f"import takes longer than the budget of {args.import_budget:g} ms", file=sys.stderr)
+        startup_failed = True
+    if matplotlib_imported:
+        print("importing the module imports matplotlib", file=sys.stderr)
+        startup_failed = True
+    for size in args.sizes:
+        size_records = benchmark_size(size, args.curve_points, args.check, args.render_limit,
+                                      args.repeat, args.seed, args.max_pairs)
+        for record in size_records:
+            if record["seconds"] is None:
+                timing = "skipped, see --max-pairs"
+            else:
+                timing = f"{record['seconds'] * 1000:10.3f} ms {record['us_per_item']:10.4f} us/item"
+            print(f"{record['size']:>9} {record['stage']:<22} {record['curve_points'] or '':>6} {timing}",
+                  file=sys.stderr, flush=True)
+        records.extend(size_records)
+    result = {"commit": git_commit(), "python": platform.python_version(), "numpy": np.__version__,
+              "platform": platform.platform(), "arguments": vars(args), "records": records}
+    text = json.dumps(result, indent=1)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as file:
+            file.write(text)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare(records, json.load(file)["records"])
+    return 1 if startup_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,14 @@ Created on Mon Feb 12 11:28:34 2024
 @author: mario
 """
 
-import matplotlib.pyplot as plt
+import numpy as np
+import hashlib
+import json
 import math
+import os
+import sqlite3
+import sys
+import time
 
 #image_name = "/home/mario/pythonProjects/Schaefflerdiagramm/Schaeffler_cut.jpg"
 # image_size = [1854, 1440] # we need the physical_size, we have to transform coordinates
@@ -16,8 +22,154 @@ import math
 # def y_transform(Ni_equivalent):
 #     return image_size[1] / 28 * (28 - Ni_equivalent) # we have to flip the axis!
 
-# in the background we will show a Schaeffler diagram with its axes in the jpg
-image_name = "/home/mario/pythonProjects/Schaefflerdiagramm/Schaeffler_cut2.jpg"
+# in the background we will show a Schaeffler diagram with its axes in the jpg,
+# the jpg and the position of its axes are described in a calibration file next
+# to it (see DiagramCalibration), another scan only needs another file
+calibration_name = os.environ.get(
+    "SCHAEFFLER_CALIBRATION",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "Schaeffler_cut2_calibration.json"))
+
+
+class _NoStage:
+    # the stage of a disabled Instrumentation, does nothing
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Stage:
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """
+    Stage timers and counters of the pipeline (equivalents, dilution points,
+    distance, ranking, rendering), with an optional cProfile run. Disabled it
+    costs one attribute lookup per call, so it stays in the code:
+
+        INSTRUMENTATION.enable()
+        ...screening...
+        INSTRUMENTATION.dump()
+
+    The times of stages are inclusive, a stage running inside another one
+    (for example distance inside ranking) is counted in both. Setting the
+    environment variable SCHAEFFLER_INSTRUMENT enables INSTRUMENTATION at
+    import and dumps its summary at exit, to stderr for "1" or else to the
+    file it names (JSON for *.json).
+    """
+
+    _no_stage = _NoStage()
+
+    def __init__(self):
+        self.enabled = False
+        self.profiler = None
+        self.reset()
+
+    def reset(self):
+        """Clears all times and counters."""
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+
+    def enable(self, profile=False):
+        """Starts collecting, with profile=True cProfile runs as well."""
+        self.enabled = True
+        if profile and self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def disable(self):
+        """Stops collecting, the results are kept until reset."""
+        self.enabled = False
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def stage(self, name):
+        """A context manager that times the stage name, if enabled."""
+        if not self.enabled:
+            return self._no_stage
+        return _Stage(self, name)
+
+    def add_time(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        """Adds amount to the counter name, if enabled."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, profile_lines=20):
+        """
+        Returns the times, calls and counters as a dict. Derived ratios (for
+        example distance evaluations per query) are added, and the top
+        functions of the cProfile run if there is one.
+        """
+        summary = {"stages": {name: {"seconds": self.times[name], "calls": self.calls[name]}
+                              for name in self.times},
+                   "counters": dict(self.counters)}
+        counters = self.counters
+        ratios = {}
+        if counters.get("queries"):
+            ratios["distance evaluations per query"] = counters.get("distance evaluations", 0) / counters["queries"]
+            ratios["curve points per query"] = counters.get("curve points", 0) / counters["queries"]
+        if counters.get("curves"):
+            ratios["segments per curve"] = counters.get("curve segments", 0) / counters["curves"]
+        summary["ratios"] = ratios
+        if self.profiler is not None:
+            import io
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(profile_lines)
+            summary["profile"] = stream.getvalue()
+        return summary
+
+    def dump(self, path=None):
+        """
+        Writes the summary to stderr (path None) or to a file, as JSON if the
+        name ends with .json.
+        """
+        summary = self.summary()
+        if path is not None and path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump(summary, file, indent=1)
+            return
+        lines = ["stage                          seconds      calls"]
+        for name, stage in sorted(summary["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:<26} {stage['seconds']:12.6f} {stage['calls']:10d}")
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"{name:<26} {value:>23}")
+        for name, value in sorted(summary["ratios"].items()):
+            lines.append(f"{name:<32} {value:17.2f}")
+        if "profile" in summary:
+            lines.append(summary["profile"])
+        text = "\n".join(lines) + "\n"
+        if path is None:
+            sys.stderr.write(text)
+        else:
+            with open(path, "w") as file:
+                file.write(text)
+
+
+INSTRUMENTATION = Instrumentation()
+if os.environ.get("SCHAEFFLER_INSTRUMENT"):
+    import atexit
+    INSTRUMENTATION.enable(profile=os.environ.get("SCHAEFFLER_PROFILE") == "1")
+    atexit.register(INSTRUMENTATION.dump,
+                    None if os.environ["SCHAEFFLER_INSTRUMENT"] == "1" else os.environ["SCHAEFFLER_INSTRUMENT"])
 
 
 def x_transform2(Cr_equivalent):
@@ -62,6 +214,129 @@ def y_transform2(Ni_equivalent):
     return int(1468 - (1468 - 30.66667) / 28 *   Ni_equivalent )
 
 
+class DiagramCalibration:
+    """
+    The affine mapping between points in the diagram (Cr-equivalent,
+    Ni-equivalent) and pixels of the background image. Unlike x_transform2 and
+    y_transform2 it works on whole arrays in both directions and does not
+    round to integer pixels.
+
+    Parameters
+    ----------
+    matrix : TYPE array-like
+        DESCRIPTION. 2x3 matrix, [x, y] = matrix @ [Cr, Ni, 1]
+    image : TYPE string
+        DESCRIPTION. path of the background image
+    cr_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Cr-equivalent shown in the image
+    ni_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Ni-equivalent shown in the image
+
+    """
+
+    def __init__(self, matrix, image=None, cr_range=(0, 36), ni_range=(0, 28)):
+        self.matrix = np.asarray(matrix, dtype=float).reshape(2, 3)
+        self.inverse = np.linalg.inv(np.vstack((self.matrix, [0.0, 0.0, 1.0])))[:2]
+        self.image = image
+        self.cr_range = tuple(cr_range)
+        self.ni_range = tuple(ni_range)
+
+    @classmethod
+    def from_reference_points(cls, reference_points, image=None, cr_range=(0, 36), ni_range=(0, 28)):
+        """
+        Fits the mapping to at least three points read off the image, for
+        example the corners of the axes.
+
+        Parameters
+        ----------
+        reference_points : TYPE list
+            DESCRIPTION. dicts with "cr", "ni" and their pixel "x", "y"
+
+        """
+        if len(reference_points) < 3:
+            raise ValueError("at least three reference points are needed")
+        diagram = np.array([[point["cr"], point["ni"], 1.0] for point in reference_points])
+        pixels = np.array([[point["x"], point["y"]] for point in reference_points])
+        solution, _, rank, _ = np.linalg.lstsq(diagram, pixels, rcond=None)
+        if rank < 3:
+            raise ValueError("the reference points must not lie on one line")
+        return cls(solution.T, image, cr_range, ni_range)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a calibration file (json) with the keys "reference_points" and
+        optional "image", "cr_range" and "ni_range". The image is relative to
+        the calibration file.
+        """
+        with open(path) as file:
+            data = json.load(file)
+        image = data.get("image")
+        if image is not None:
+            image = os.path.join(os.path.dirname(os.path.abspath(path)), image)
+        return cls.from_reference_points(data["reference_points"], image,
+                                         data.get("cr_range", (0, 36)),
+                                         data.get("ni_range", (0, 28)))
+
+    def to_pixels(self, points):
+        """Transforms points (n, 2) of the diagram to pixels (n, 2) of the image."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return points @ self.matrix[:, :2].T + self.matrix[:, 2]
+
+    def to_diagram(self, pixels):
+        """Transforms pixels (n, 2) of the image to points (n, 2) of the diagram."""
+        pixels = np.asarray(pixels, dtype=float).reshape(-1, 2)
+        return pixels @ self.inverse[:, :2].T + self.inverse[:, 2]
+
+
+_calibration = None
+
+
+def get_calibration():
+    """
+    Returns the calibration all plot functions use, loaded from
+    calibration_name at the first call.
+    """
+    global _calibration
+    if _calibration is None:
+        _calibration = DiagramCalibration.load(calibration_name)
+    return _calibration
+
+
+def set_calibration(calibration):
+    """
+    Sets the calibration all plot functions use, a DiagramCalibration or the
+    path of a calibration file.
+    """
+    global _calibration
+    if not isinstance(calibration, DiagramCalibration):
+        calibration = DiagramCalibration.load(calibration)
+    _calibration = calibration
+
+
+def transform_points2(points):
+    """
+    Transforms a whole array of points of the diagram to the image we plot on,
+    with the current calibration.
+
+    Parameters
+    ----------
+    points : TYPE array-like
+        DESCRIPTION. points of shape (n, 2), x is chromium equivalent and
+                     second is Ni-equivalent
+
+    Returns
+    -------
+    x_coords : TYPE numpy array
+        DESCRIPTION. x-coordinates of the jpg background we plot on
+    y_coords : TYPE numpy array
+        DESCRIPTION. y-coordinates of the jpg background we plot on
+
+    """
+    pixels = get_calibration().to_pixels(points)
+    return pixels[:, 0], pixels[:, 1]
+
+
 def get_value(metal_dict, key):
     """
     Only returns the value to a key of a metal_dict. Kind of useless, but hey.
@@ -148,6 +423,153 @@ def Ni_equivalent(metal_dict):
     return Ni + 30 * C + 0.5 * Mn
 
 
+class AlloyCatalog:
+    """
+    A columnar catalog of metals. Instead of one metal_dict per alloy, every
+    element is stored as a numpy array over all alloys of the catalog, so
+    equivalents can be calculated for the whole catalog at once. Elements that
+    are missing in a metal_dict are 0.0 in the catalog, exactly like the
+    KeyError-fallback in Cr_equivalent and Ni_equivalent.
+
+    Parameters
+    ----------
+    names : TYPE list
+        DESCRIPTION. names of the alloys, one for every row of the catalog
+    columns : TYPE dict
+        DESCRIPTION. element as key ("C", "Cr", ...) and a sequence of weight
+                     percentages (one per alloy) as value
+
+    """
+
+    def __init__(self, names, columns):
+        self.names = list(names)
+        self.columns = {}
+        for element, values in columns.items():
+            values = np.asarray(values, dtype=float)
+            if values.shape != (len(self.names),):
+                raise ValueError(f"column {element!r} has shape {values.shape}, "
+                                 f"expected ({len(self.names)},)")
+            self.columns[element] = values
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_dicts(cls, metal_dicts):
+        """
+        Builds a catalog from metal_dicts like steel_14021_avg_dict or
+        bohler_Thermanit2509CuT_avg_dict.
+
+        Parameters
+        ----------
+        metal_dicts : TYPE list
+            DESCRIPTION. list of metal_dicts, each with a "name" key and the
+                         weight percentages of its elements
+
+        Returns
+        -------
+        TYPE AlloyCatalog
+            DESCRIPTION. the catalog, rows in the order of metal_dicts
+
+        """
+        metal_dicts = list(metal_dicts)
+        names = [metal_dict.get("name", f"alloy_{i}") for i, metal_dict in enumerate(metal_dicts)]
+        elements = []
+        for metal_dict in metal_dicts:
+            for key in metal_dict:
+                if key != "name" and key not in elements:
+                    elements.append(key)
+        columns = {element: [metal_dict.get(element, 0.0) for metal_dict in metal_dicts]
+                   for element in elements}
+        return cls(names, columns)
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, element):
+        """
+        Returns the weight percentages of element for all alloys, zeros if
+        no alloy of the catalog contains the element.
+        """
+        try:
+            return self.columns[element]
+        except KeyError:
+            return np.zeros(len(self.names))
+
+    def to_dict(self, name):
+        """
+        Returns the metal_dict of the alloy name. Only elements that are not
+        0.0 are contained, as in the usual metal_dicts.
+        """
+        i = self.index[name]
+        metal_dict = {"name": name}
+        for element, values in self.columns.items():
+            if values[i] != 0.0:
+                metal_dict[element] = float(values[i])
+        return metal_dict
+
+
+def cr_equivalent(catalog):
+    """
+    Calculates the Cr-equivalents of all alloys in an AlloyCatalog in one pass.
+    Same formula as Cr_equivalent.
+
+    Parameters
+    ----------
+    catalog : TYPE AlloyCatalog
+        DESCRIPTION. the alloys we want the Cr-equivalents of
+
+    Returns
+    -------
+    TYPE numpy array
+        DESCRIPTION. Cr-equivalent of every alloy, in catalog order
+
+    """
+    return (catalog.column("Cr") + catalog.column("Mo") + 1.5 * catalog.column("Si")
+            + 0.5 * catalog.column("Nb"))
+
+
+def ni_equivalent(catalog):
+    """
+    Calculates the Ni-equivalents of all alloys in an AlloyCatalog in one pass.
+    Same formula as Ni_equivalent.
+
+    Parameters
+    ----------
+    catalog : TYPE AlloyCatalog
+        DESCRIPTION. the alloys we want the Ni-equivalents of
+
+    Returns
+    -------
+    TYPE numpy array
+        DESCRIPTION. Ni-equivalent of every alloy, in catalog order
+
+    """
+    return catalog.column("Ni") + 30 * catalog.column("C") + 0.5 * catalog.column("Mn")
+
+
+def equivalent_points(catalog):
+    """
+    Returns the points of all alloys in an AlloyCatalog in the Schaeffler
+    diagram as an array of shape (len(catalog), 2), x is the Cr-equivalent and
+    y the Ni-equivalent, like the points returned by weld_steels_filler.
+    """
+    with INSTRUMENTATION.stage("equivalents"):
+        INSTRUMENTATION.count("equivalent points", len(catalog))
+        return np.column_stack((cr_equivalent(catalog), ni_equivalent(catalog)))
+
+
+def _pyplot(backend=None):
+    """
+    matplotlib.pyplot, imported at the first plot: importing it takes most of
+    a second, the calculations do not need it. With backend, matplotlib is
+    switched to it first, for example "Agg" for figures only written to files.
+    """
+    if backend is not None:
+        import matplotlib
+        matplotlib.use(backend)
+    import matplotlib.pyplot as plt
+    return plt
+
+
 def plot_background(alpha):
     """
     Plots the background of the Schaeffler diagram we want to plot on.
@@ -163,8 +585,9 @@ def plot_background(alpha):
     None.
 
     """
+    plt = _pyplot()
     plt.figure(figsize=(15,9))
-    im = plt.imread(image_name)
+    im = plt.imread(get_calibration().image)
     implot = plt.imshow(im, alpha=alpha)
     plt.axis('off')
     plt.tight_layout()
@@ -187,12 +610,13 @@ def plot_metal_dict(metal_dict, text):
     None.
 
     """
+    plt = _pyplot()
     Cr_equi = Cr_equivalent(metal_dict)
     Ni_equi = Ni_equivalent(metal_dict)
-    x_coord = x_transform2(Cr_equi)
-    y_coord = y_transform2(Ni_equi)
+    x_coord, y_coord = get_calibration().to_pixels([Cr_equi, Ni_equi])[0]
     plt.scatter(x_coord, y_coord, s=200)
-    plt.text(int(x_coord+10), int(y_coord), text)
+    plt.text(x_coord+10, y_coord, text)
+    INSTRUMENTATION.count("artists created", 2)
 
     
 def plot_mix_dicts(metal_dict1, metal_dict2, mix_percentage):
@@ -217,17 +641,11 @@ def plot_mix_dicts(metal_dict1, metal_dict2, mix_percentage):
     None.
 
     """
+    plt = _pyplot()
     # plot distance in mix percent from metaldict_1 to metaldict_2
-    Cr_equi1 = Cr_equivalent(metal_dict1)
-    Ni_equi1 = Ni_equivalent(metal_dict1)
-    Cr_equi2 = Cr_equivalent(metal_dict2)
-    Ni_equi2 = Ni_equivalent(metal_dict2)
+    Cr_mix, Ni_mix = mix_dicts(metal_dict1, metal_dict2, mix_percentage)
     
-    Cr_mix = Cr_equi2 + abs(Cr_equi1 - Cr_equi2) * mix_percentage/100
-    Ni_mix = Ni_equi2 + abs(Ni_equi1 - Ni_equi2) * mix_percentage/100
-    
-    x_coord = x_transform2(Cr_mix)
-    y_coord = y_transform2(Ni_mix)
+    x_coord, y_coord = get_calibration().to_pixels([Cr_mix, Ni_mix])[0]
     plt.scatter(x_coord, y_coord, marker="D", s=150)
  
     
@@ -255,14 +673,10 @@ def mix_dicts(metal_dict1, metal_dict2, mix_percentage):
         DESCRIPTION. coordinates of the mixure point in the Schaeffler diagram
 
     """
-    Cr_equi1 = Cr_equivalent(metal_dict1)
-    Ni_equi1 = Ni_equivalent(metal_dict1)
-    Cr_equi2 = Cr_equivalent(metal_dict2)
-    Ni_equi2 = Ni_equivalent(metal_dict2)
-    
-    Cr_mix = Cr_equi2 + abs(Cr_equi1 - Cr_equi2) * mix_percentage / 100
-    Ni_mix = Ni_equi2 + abs(Ni_equi1 - Ni_equi2) * mix_percentage / 100
-    return [Cr_mix, Ni_mix]
+    # mix_percentage % of the way from metal_dict2 to metal_dict1, on the line
+    # between the two metals for either order of them
+    return mix_points([Cr_equivalent(metal_dict1), Ni_equivalent(metal_dict1)],
+                      [Cr_equivalent(metal_dict2), Ni_equivalent(metal_dict2)], mix_percentage)
 
 
 def plot_metal_point(metal_point, text):
@@ -282,10 +696,11 @@ def plot_metal_point(metal_point, text):
     None.
 
     """
-    x_coord = x_transform2(metal_point[0])
-    y_coord = y_transform2(metal_point[1])
+    plt = _pyplot()
+    x_coord, y_coord = get_calibration().to_pixels(metal_point)[0]
     plt.scatter(x_coord, y_coord, marker="^", s=250)
-    plt.text(int(x_coord+10), int(y_coord), text)
+    plt.text(x_coord+10, y_coord, text)
+    INSTRUMENTATION.count("artists created", 2)
 
 
 def mix_points(metal_point1, metal_point2, mix_percentage):
@@ -322,6 +737,35 @@ def mix_points(metal_point1, metal_point2, mix_percentage):
     return [Cr_mix, Ni_mix]
 
 
+def mix_point_arrays(metal_points1, metal_points2, mix_percentages):
+    """
+    Same as mix_points for arrays of points, for example the dilution points
+    of many fillers: mix_point_arrays(mix50_points, filler_points, dilutions).
+
+    Parameters
+    ----------
+    metal_points1 : TYPE numpy array
+        DESCRIPTION. first points, shape (..., 2), the last axis is
+                     [Cr-equivalent, Ni-equivalent]
+    metal_points2 : TYPE numpy array
+        DESCRIPTION. second points, shape (..., 2), broadcast against metal_points1
+    mix_percentages : TYPE float or numpy array
+        DESCRIPTION. percentage of dilution with respect to point_2, a number
+                     or an array broadcast against the points without their
+                     last axis
+
+    Returns
+    -------
+    TYPE numpy array
+        DESCRIPTION. the mixed points, shape (..., 2)
+
+    """
+    metal_points1 = np.asarray(metal_points1, dtype=float)
+    metal_points2 = np.asarray(metal_points2, dtype=float)
+    mix_percentages = np.asarray(mix_percentages, dtype=float)[..., None]
+    return metal_points2 + (metal_points1 - metal_points2) * mix_percentages / 100
+
+
 def plot_line_points(metal_point1, metal_point2, style, markersize):
     """
     Plots a line between two points in the Schaeffler diagram.
@@ -341,12 +785,12 @@ def plot_line_points(metal_point1, metal_point2, style, markersize):
     None.
 
     """
-    x_coord1 = x_transform2(metal_point1[0])
-    y_coord1 = y_transform2(metal_point1[1])
+    plt = _pyplot()
+    x_coord1, y_coord1 = get_calibration().to_pixels(metal_point1)[0]
     
-    x_coord2 = x_transform2(metal_point2[0])
-    y_coord2 = y_transform2(metal_point2[1])
+    x_coord2, y_coord2 = get_calibration().to_pixels(metal_point2)[0]
     plt.plot([x_coord1,x_coord2], [y_coord1,y_coord2], style, markersize=markersize)
+    INSTRUMENTATION.count("artists created")
 
 
 def plot_line_dicts(metal_dict1, metal_dict2, style):
@@ -368,20 +812,111 @@ def plot_line_dicts(metal_dict1, metal_dict2, style):
     None.
 
     """
+    plt = _pyplot()
     Cr_equi1 = Cr_equivalent(metal_dict1)
     Ni_equi1 = Ni_equivalent(metal_dict1)
     Cr_equi2 = Cr_equivalent(metal_dict2)
     Ni_equi2 = Ni_equivalent(metal_dict2)
         
-    x_coord1 = x_transform2(Cr_equi1)
-    y_coord1 = y_transform2(Ni_equi1)
+    x_coord1, y_coord1 = get_calibration().to_pixels([Cr_equi1, Ni_equi1])[0]
     
-    x_coord2 = x_transform2(Cr_equi2)
-    y_coord2 = y_transform2(Ni_equi2)
+    x_coord2, y_coord2 = get_calibration().to_pixels([Cr_equi2, Ni_equi2])[0]
     plt.plot([x_coord1,x_coord2], [y_coord1,y_coord2], style)
 
 
-def weld_steels_filler(metal_dict1, metal_dict2, filler_dict):
+# the dilutions weld_steels_filler calculates, in %
+WELD_DILUTIONS = [10, 20, 25, 30, 35, 40, 50]
+
+
+class WeldResult:
+    """
+    The result of the usual graphical calculation for welding two steels with
+    a filler, without anything plotted. Created by compute_weld_steels_filler,
+    drawn by render_weld_result.
+
+    Attributes
+    ----------
+    filler_point : TYPE list
+        DESCRIPTION. point of the filler material in the Schaeffler diagram
+    mix50_point : TYPE list
+        DESCRIPTION. point of the 50% mixture of the two steels
+    dilutions : TYPE list
+        DESCRIPTION. the dilutions in %
+    dilution_points : TYPE list
+        DESCRIPTION. one point for every dilution, on the line from the
+                     filler_point to the mix50_point
+
+    """
+
+    def __init__(self, filler_point, mix50_point, dilutions, dilution_points):
+        self.filler_point = filler_point
+        self.mix50_point = mix50_point
+        self.dilutions = dilutions
+        self.dilution_points = dilution_points
+
+    def points_list(self):
+        """
+        Returns the list of points weld_steels_filler returns, the filler point
+        first and then the dilution points.
+        """
+        return [self.filler_point] + self.dilution_points
+
+
+def compute_weld_steels_filler(metal_dict1, metal_dict2, filler_dict, dilutions=WELD_DILUTIONS):
+    """
+    Performs the calculation of weld_steels_filler, but nothing is plotted.
+
+    Parameters
+    ----------
+    metal_dict1 : TYPE dict
+        DESCRIPTION. contains the weight percentages of elements of the first metal
+    metal_dict2 : TYPE dict
+        DESCRIPTION. contains the weight percentages of elements the second metal
+    filler_dict : TYPE dict
+        DESCRIPTION. contains the weight percentages of elements the filler material
+    dilutions : TYPE list
+        DESCRIPTION. the dilutions in % we want the points of
+
+    Returns
+    -------
+    TYPE WeldResult
+        DESCRIPTION. filler point, 50% point of the steels and dilution points
+
+    """
+    with INSTRUMENTATION.stage("dilution points"):
+        mix50_steels_point = mix_dicts(metal_dict1, metal_dict2, 50)
+        weldfiller_point = [Cr_equivalent(filler_dict), Ni_equivalent(filler_dict)]
+        dilution_points = [mix_points(mix50_steels_point, weldfiller_point, dilution)
+                           for dilution in dilutions]
+    return WeldResult(weldfiller_point, mix50_steels_point, list(dilutions), dilution_points)
+
+
+def render_weld_result(weld_result):
+    """
+    Plots a WeldResult like weld_steels_filler does: the 50% point of the
+    steels, all dilution points and the line from the 50% point to the filler.
+
+    Parameters
+    ----------
+    weld_result : TYPE WeldResult
+        DESCRIPTION. the result of compute_weld_steels_filler
+
+    Returns
+    -------
+    None.
+
+    """
+    plt = _pyplot()
+    with INSTRUMENTATION.stage("rendering"):
+        x_coord, y_coord = get_calibration().to_pixels(weld_result.mix50_point)[0]
+        plt.scatter(x_coord, y_coord, marker="D", s=150)
+        INSTRUMENTATION.count("artists created")
+        plot_metal_points(weld_result.dilution_points,
+                          [f"{dilution}% dilution" for dilution in weld_result.dilutions])
+        plot_line_points(weld_result.mix50_point, weld_result.filler_point, "b--", 10)
+
+
+def weld_steels_filler(metal_dict1, metal_dict2, filler_dict, plot=True):
     """
     Performs the usual graphical calculation that we do when we want to weld 
     two steels with a certain filler.
@@ -394,44 +929,53 @@ def weld_steels_filler(metal_dict1, metal_dict2, filler_dict):
         DESCRIPTION. contains the weight percentages of elements the second metal
     filler_dict : TYPE dict
         DESCRIPTION. contains the weight percentages of elements the filler material
+    plot : TYPE bool
+        DESCRIPTION. if False, nothing is plotted, only the points are calculated
 
     Returns
     -------
-    None.
+    list
+        DESCRIPTION. the filler point and the points at 10, 20, 25, 30, 35, 40
+                     and 50% dilution
 
     """
-    results_points_list = []
-    
-    plot_mix_dicts(metal_dict1, metal_dict2, 50)
-    mix50_steels_point = mix_dicts(metal_dict1, metal_dict2, 50)
-    weldfiller_point = [Cr_equivalent(filler_dict), Ni_equivalent(filler_dict)]
-    results_points_list.append(weldfiller_point) # the first point will be the filler material itself
-    mix10_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 10)
-    mix20_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 20)
-    mix25_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 25)
-    mix30_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 30)
-    mix35_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 35)
-    mix40_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 40)
-    mix50_weldfiller_mix50steels_point = mix_points(mix50_steels_point, weldfiller_point, 50)
-    # we add above dilution points
-    results_points_list.append(mix10_weldfiller_mix50steels_point) # the add the 10% point
-    results_points_list.append(mix20_weldfiller_mix50steels_point) # the add the 20% point
-    results_points_list.append(mix25_weldfiller_mix50steels_point) # the add the 25% point
-    results_points_list.append(mix30_weldfiller_mix50steels_point) # the add the 30% point
-    results_points_list.append(mix35_weldfiller_mix50steels_point) # the add the 35% point
-    results_points_list.append(mix40_weldfiller_mix50steels_point) # the add the 40% point
-    results_points_list.append(mix50_weldfiller_mix50steels_point) # the add the 50% point
-    plot_metal_point(mix10_weldfiller_mix50steels_point, "10% dilution")
-    plot_metal_point(mix20_weldfiller_mix50steels_point, "20% dilution")
-    plot_metal_point(mix25_weldfiller_mix50steels_point, "25% dilution")
-    plot_metal_point(mix30_weldfiller_mix50steels_point, "30% dilution")
-    plot_metal_point(mix35_weldfiller_mix50steels_point, "35% dilution")
-    plot_metal_point(mix40_weldfiller_mix50steels_point, "40% dilution")
-    plot_metal_point(mix50_weldfiller_mix50steels_point, "50% dilution")
-    plot_line_points(mix50_steels_point, weldfiller_point, "b--", 10)
-    return results_points_list
+    weld_result = compute_weld_steels_filler(metal_dict1, metal_dict2, filler_dict)
+    if plot:
+        render_weld_result(weld_result)
+    return weld_result.points_list()
     
 
+def weld_steels_fillers(metal_dict1, metal_dict2, filler_dicts, plot=False):
+    """
+    Calls weld_steels_filler for every filler and collects the results in a
+    results_dict for find_best_filler, the filler name is the key.
+
+    Parameters
+    ----------
+    metal_dict1 : TYPE dict
+        DESCRIPTION. contains the weight percentages of elements of the first metal
+    metal_dict2 : TYPE dict
+        DESCRIPTION. contains the weight percentages of elements the second metal
+    filler_dicts : TYPE list
+        DESCRIPTION. metal_dicts of the fillers, for example from
+                     AlloyDatabase.query
+    plot : TYPE bool
+        DESCRIPTION. if True, the results are plotted
+
+    Returns
+    -------
+    TYPE WeldResultStore
+        DESCRIPTION. results_dict with the filler names as keys
+
+    """
+    filler_dicts = list(filler_dicts)
+    results_dict = WeldResultStore(capacity=len(filler_dicts))
+    for filler_dict in filler_dicts:
+        results_dict[get_value(filler_dict, "name")] = weld_steels_filler(metal_dict1, metal_dict2,
+                                                                         filler_dict, plot)
+    return results_dict
+
+
 def find_distance_points(metal_point1, metal_point2):
     point1_x = metal_point1[0]
     point1_y = metal_point1[1]
@@ -460,6 +1004,7 @@ def find_min_distance_point_to_curve(curve, point):
     # create some dummy values 
     points_list = [[1000000000000, 1000000000000], [1000000000000, 1000000000000]]
     distance = 100000000
+    INSTRUMENTATION.count("distance evaluations", len(curve))
     
     for i,point_curve in enumerate(curve):
         distance_new = find_distance_points(point_curve, point)
@@ -471,6 +1016,512 @@ def find_min_distance_point_to_curve(curve, point):
     return points_list
 
 
+class CurveSegments:
+    """
+    Precomputed segment tables of a curve (a list of points like
+    ferrite_10_percent_line or s_curve_center). Unlike
+    find_min_distance_point_to_curve, which only knows the digitized vertices,
+    the distance is measured to the straight segments between the vertices, so
+    the result does not depend on how densely a curve was digitized.
+    Build it once per curve and reuse it for all queries.
+
+    Parameters
+    ----------
+    curve : TYPE list of lists
+        DESCRIPTION. A curve (list of points) in the Schaeffler diagram
+
+    """
+
+    # number of (query point, segment) pairs that are evaluated at once,
+    # limits the memory of the (points x segments) temporaries
+    chunk_size = 2 ** 20
+
+    def __init__(self, curve):
+        vertices = np.asarray(curve, dtype=float).reshape(-1, 2)
+        if len(vertices) == 0:
+            raise ValueError("a curve needs at least one point")
+        if len(vertices) == 1:
+            # a single point is a segment of length 0
+            vertices = np.vstack((vertices, vertices))
+        self.vertices = vertices
+        self.starts = vertices[:-1]
+        self.directions = vertices[1:] - vertices[:-1]
+        INSTRUMENTATION.count("curves")
+        INSTRUMENTATION.count("curve segments", len(self.starts))
+        self.lengths_sq = np.einsum("ij,ij->i", self.directions, self.directions)
+        self.lengths = np.sqrt(self.lengths_sq)
+        # zero length segments would divide by zero in the projection
+        self.inv_lengths_sq = np.divide(1.0, self.lengths_sq,
+                                        out=np.zeros_like(self.lengths_sq),
+                                        where=self.lengths_sq > 0)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def nearest(self, points):
+        """
+        Projects an array of points onto all segments of the curve and returns
+        the nearest point on the curve for every query point.
+
+        Parameters
+        ----------
+        points : TYPE array-like
+            DESCRIPTION. a single point [Cr, Ni] or an array of shape (n, 2)
+
+        Returns
+        -------
+        nearest_points : TYPE numpy array
+            DESCRIPTION. nearest points on the curve, shape (n, 2)
+        segment_index : TYPE numpy array
+            DESCRIPTION. index of the segment the nearest point lies on, the
+                         segment i connects curve[i] and curve[i+1]
+        distances : TYPE numpy array
+            DESCRIPTION. distance of every query point to the curve
+
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        INSTRUMENTATION.count("distance evaluations", len(points) * len(self))
+        nearest_points = np.empty_like(points)
+        segment_index = np.empty(len(points), dtype=np.intp)
+        distances = np.empty(len(points))
+        rows_per_chunk = max(1, self.chunk_size // len(self))
+        for start in range(0, len(points), rows_per_chunk):
+            chunk = points[start:start + rows_per_chunk]
+            relative = chunk[:, None, :] - self.starts[None, :, :]
+            t = np.einsum("ijk,jk->ij", relative, self.directions) * self.inv_lengths_sq
+            np.clip(t, 0.0, 1.0, out=t)
+            offset = relative - t[:, :, None] * self.directions[None, :, :]
+            distances_sq = np.einsum("ijk,ijk->ij", offset, offset)
+            best = np.argmin(distances_sq, axis=1)
+            rows = np.arange(len(chunk))
+            stop = start + len(chunk)
+            segment_index[start:stop] = best
+            nearest_points[start:stop] = (self.starts[best]
+                                          + t[rows, best, None] * self.directions[best])
+            distances[start:stop] = np.sqrt(distances_sq[rows, best])
+        return nearest_points, segment_index, distances
+
+    def signed_distances(self, points):
+        """
+        Distances of an array of points to the curve, positive for points to
+        the right of the curve (in the direction of its points), for the
+        iso-ferrite lines and the S-curve borders that is the side with more
+        ferrite.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        nearest_points, segment_index, distances = self.nearest(points)
+        directions = self.directions[segment_index]
+        offset = points - nearest_points
+        side = directions[:, 1] * offset[:, 0] - directions[:, 0] * offset[:, 1]
+        return np.where(side >= 0, distances, -distances)
+
+    def first_crossing(self, starts, ends):
+        """
+        Intersects n query segments with the curve and returns the first
+        crossing along every query segment.
+
+        Parameters
+        ----------
+        starts : TYPE array-like
+            DESCRIPTION. start points of the query segments, shape (n, 2)
+        ends : TYPE array-like
+            DESCRIPTION. end points of the query segments, shape (n, 2)
+
+        Returns
+        -------
+        fraction : TYPE numpy array
+            DESCRIPTION. position of the first crossing along every query
+                         segment, 0 at the start and 1 at the end, nan if the
+                         segment does not cross the curve
+        crossing_points : TYPE numpy array
+            DESCRIPTION. the crossings, shape (n, 2), nan if there is none
+        segment_index : TYPE numpy array
+            DESCRIPTION. index of the crossed segment of the curve, -1 if none
+
+        """
+        starts, ends = np.broadcast_arrays(np.asarray(starts, dtype=float).reshape(-1, 2),
+                                           np.asarray(ends, dtype=float).reshape(-1, 2))
+        fraction = np.full(len(starts), np.nan)
+        segment_index = np.full(len(starts), -1, dtype=np.intp)
+        rows_per_chunk = max(1, self.chunk_size // len(self))
+        for start in range(0, len(starts), rows_per_chunk):
+            stop = start + rows_per_chunk
+            origin = starts[start:stop, None, :]
+            ray = (ends[start:stop] - starts[start:stop])[:, None, :]
+            offset = self.starts[None, :, :] - origin
+            # solve origin + u * ray == curve_start + v * direction
+            denominator = ray[..., 0] * self.directions[:, 1] - ray[..., 1] * self.directions[:, 0]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                u = (offset[..., 0] * self.directions[:, 1]
+                     - offset[..., 1] * self.directions[:, 0]) / denominator
+                v = (offset[..., 0] * ray[..., 1] - offset[..., 1] * ray[..., 0]) / denominator
+            hit = (denominator != 0) & (u >= 0) & (u <= 1) & (v >= 0) & (v <= 1)
+            u = np.where(hit, u, np.inf)
+            first = np.argmin(u, axis=1)
+            u_first = u[np.arange(len(u)), first]
+            found = np.isfinite(u_first)
+            fraction[start:stop][found] = u_first[found]
+            segment_index[start:stop][found] = first[found]
+        crossing_points = starts + fraction[:, None] * (ends - starts)
+        return fraction, crossing_points, segment_index
+
+
+def find_min_distance_point_to_polyline(curve, point):
+    """
+    Like find_min_distance_point_to_curve, but the distance is measured to the
+    segments of the curve instead of its vertices.
+
+    Parameters
+    ----------
+    curve : TYPE list of lists or CurveSegments
+        DESCRIPTION. A curve (list of points) or its precomputed CurveSegments
+    point : TYPE list
+        DESCRIPTION. point, x is chromium equivalent and second is Ni-equivalent
+
+    Returns
+    -------
+    TYPE list
+        DESCRIPTION. [point, nearest point on the curve, distance], the same
+                     shape as the result of find_min_distance_point_to_curve
+
+    """
+    if not isinstance(curve, CurveSegments):
+        curve = CurveSegments(curve)
+    nearest_points, segment_index, distances = curve.nearest(point)
+    return [point, nearest_points[0].tolist(), float(distances[0])]
+
+
+class _BoxTree:
+    """
+    A small static KD-tree over axis-aligned boxes of shape (n, 4) given as
+    [x_min, y_min, x_max, y_max]; for points x_min == x_max and y_min == y_max.
+    Inner nodes split at the median of the box centers along the wider
+    coordinate and keep the bounding box of all their items, leaves hold up to
+    leaf_size items. All queries of a batch walk down the tree together.
+    """
+
+    leaf_size = 8
+
+    def __init__(self, boxes):
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.centers = 0.5 * (boxes[:, :2] + boxes[:, 2:])
+        self.boxes = boxes
+        self.order = np.arange(len(boxes))
+        nodes = []
+        self._build(nodes, 0, len(boxes))
+        nodes = np.array(nodes, dtype=float).reshape(-1, 8)
+        self.node_boxes = nodes[:, 2:6]
+        self.left = nodes[:, 6].astype(np.intp)
+        self.right = nodes[:, 7].astype(np.intp)
+        # the items of every leaf, padded with -1 to leaf_size
+        self.leaf_items = np.full((len(nodes), self.leaf_size), -1, dtype=np.intp)
+        for node_id, (lo, hi) in enumerate(nodes[:, :2].astype(np.intp)):
+            if self.left[node_id] < 0:
+                self.leaf_items[node_id, :hi - lo] = self.order[lo:hi]
+
+    def _build(self, nodes, lo, hi):
+        node_id = len(nodes)
+        items = self.order[lo:hi]
+        block = self.boxes[items]
+        nodes.append([lo, hi, *block[:, :2].min(axis=0), *block[:, 2:].max(axis=0), -1, -1])
+        if hi - lo <= self.leaf_size:
+            return node_id
+        centers = self.centers[items]
+        dim = int(np.argmax(np.ptp(centers, axis=0)))
+        mid = (hi - lo) // 2
+        self.order[lo:hi] = items[np.argpartition(centers[:, dim], mid)]
+        left = self._build(nodes, lo, lo + mid)
+        right = self._build(nodes, lo + mid, hi)
+        nodes[node_id][6:] = [left, right]
+        return node_id
+
+    def _bounds_sq(self, node_ids, points):
+        boxes = self.node_boxes[node_ids]
+        delta = np.maximum(np.maximum(boxes[:, :2] - points, points - boxes[:, 2:]), 0.0)
+        return np.einsum("ij,ij->i", delta, delta)
+
+    def _limits_sq(self, node_ids, points):
+        # the boxes are tight, so every face touches an item and the farther
+        # end of the nearest face is an upper limit of the nearest distance
+        boxes = self.node_boxes[node_ids]
+        near_sq = np.minimum((boxes[:, :2] - points) ** 2, (boxes[:, 2:] - points) ** 2)
+        far_sq = np.maximum((boxes[:, :2] - points) ** 2, (boxes[:, 2:] - points) ** 2)
+        return np.minimum(near_sq[:, 0] + far_sq[:, 1], near_sq[:, 1] + far_sq[:, 0])
+
+    def _visit_leaves(self, query_ids, node_ids, points, distances_sq, best, best_d2):
+        items = self.leaf_items[node_ids]
+        d2 = distances_sq(points[query_ids], items)
+        d2[items < 0] = np.inf
+        column = np.argmin(d2, axis=1)
+        rows = np.arange(len(query_ids))
+        d2_min = d2[rows, column]
+        # several leaves of one query may be visited in the same round
+        np.minimum.at(best_d2, query_ids, d2_min)
+        hit = d2_min == best_d2[query_ids]
+        best[query_ids[hit]] = items[rows, column][hit]
+
+    def nearest(self, points, distances_sq):
+        """
+        Returns the index of the nearest item and its squared distance for
+        every point of an array of shape (n, 2). distances_sq(points, items)
+        must return the exact squared distances of points (k, 2) to the items
+        (k, leaf_size) as an array of shape (k, leaf_size).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        best = np.full(len(points), -1, dtype=np.intp)
+        best_d2 = np.full(len(points), np.inf)
+        # a greedy descent to the nearest leaf gives every query a first bound
+        node_ids = np.zeros(len(points), dtype=np.intp)
+        inner = np.flatnonzero(self.left[node_ids] >= 0)
+        while len(inner):
+            left = self.left[node_ids[inner]]
+            right = self.right[node_ids[inner]]
+            go_left = (self._limits_sq(left, points[inner])
+                       <= self._limits_sq(right, points[inner]))
+            node_ids[inner] = np.where(go_left, left, right)
+            inner = inner[self.left[node_ids[inner]] >= 0]
+        query_ids = np.arange(len(points))
+        self._visit_leaves(query_ids, node_ids, points, distances_sq, best, best_d2)
+        # then every node that could still hold a nearer item is visited, level
+        # by level, the limits of the visited nodes prune the next level
+        limit_d2 = best_d2.copy()
+        node_ids = np.zeros(len(points), dtype=np.intp)
+        while len(query_ids):
+            query_points = points[query_ids]
+            np.minimum.at(limit_d2, query_ids, self._limits_sq(node_ids, query_points))
+            bounds = self._bounds_sq(node_ids, query_points)
+            keep = (bounds < best_d2[query_ids]) & (bounds <= limit_d2[query_ids])
+            query_ids, node_ids = query_ids[keep], node_ids[keep]
+            leaf = self.left[node_ids] < 0
+            if leaf.any():
+                self._visit_leaves(query_ids[leaf], node_ids[leaf], points, distances_sq,
+                                   best, best_d2)
+            query_ids = np.tile(query_ids[~leaf], 2)
+            node_ids = np.concatenate((self.left[node_ids[~leaf]], self.right[node_ids[~leaf]]))
+        return best, best_d2
+
+
+class CurveIndex:
+    """
+    A reusable spatial index of a digitized curve, build it once per curve.
+    It answers nearest-vertex and nearest-segment queries in logarithmic time,
+    for a single point or for arrays of points.
+
+    Parameters
+    ----------
+    curve : TYPE list of lists or CurveSegments
+        DESCRIPTION. A curve (list of points) or its precomputed CurveSegments
+
+    """
+
+    def __init__(self, curve):
+        if not isinstance(curve, CurveSegments):
+            curve = CurveSegments(curve)
+        self.segments = curve
+        self.vertices = curve.vertices
+        ends = curve.starts + curve.directions
+        self._vertex_tree = _BoxTree(np.hstack((self.vertices, self.vertices)))
+        self._segment_tree = _BoxTree(np.hstack((np.minimum(curve.starts, ends),
+                                                 np.maximum(curve.starts, ends))))
+
+    def _vertex_distances_sq(self, points, vertex_ids):
+        offset = self.vertices[vertex_ids] - points[:, None, :]
+        return np.einsum("ijk,ijk->ij", offset, offset)
+
+    def _project(self, points, segment_ids):
+        starts = self.segments.starts[segment_ids]
+        directions = self.segments.directions[segment_ids]
+        relative = points[:, None, :] - starts
+        t = np.einsum("ijk,ijk->ij", relative, directions) * self.segments.inv_lengths_sq[segment_ids]
+        np.clip(t, 0.0, 1.0, out=t)
+        return starts + t[:, :, None] * directions
+
+    def _segment_distances_sq(self, points, segment_ids):
+        offset = points[:, None, :] - self._project(points, segment_ids)
+        return np.einsum("ijk,ijk->ij", offset, offset)
+
+    def nearest_vertex(self, points):
+        """
+        Returns the index of the nearest vertex of the curve and its distance
+        for every point of an array of shape (n, 2) (or a single point).
+        """
+        vertex_index, distances_sq = self._vertex_tree.nearest(points, self._vertex_distances_sq)
+        return vertex_index, np.sqrt(distances_sq)
+
+    def nearest_segment(self, points):
+        """
+        Same result as CurveSegments.nearest, but only the segments near each
+        point are projected on.
+
+        Returns
+        -------
+        nearest_points : TYPE numpy array
+            DESCRIPTION. nearest points on the curve, shape (n, 2)
+        segment_index : TYPE numpy array
+            DESCRIPTION. index of the segment the nearest point lies on
+        distances : TYPE numpy array
+            DESCRIPTION. distance of every query point to the curve
+
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        segment_index, distances_sq = self._segment_tree.nearest(points, self._segment_distances_sq)
+        nearest_points = self._project(points, segment_index[:, None])[:, 0, :]
+        return nearest_points, segment_index, np.sqrt(distances_sq)
+
+
+def find_min_distance_point_to_curve_indexed(curve_index, point):
+    """
+    Same as find_min_distance_point_to_curve, but with a CurveIndex of the
+    curve, so the vertices are not searched one by one.
+
+    Returns
+    -------
+    TYPE list
+        DESCRIPTION. [point, nearest vertex of the curve, distance]
+
+    """
+    vertex_index, distances = curve_index.nearest_vertex(point)
+    return [point, curve_index.vertices[vertex_index[0]].tolist(), float(distances[0])]
+
+
+def find_min_distance_points_on_curves_indexed(curve1, curve_index2):
+    """
+    Same as find_min_distance_points_on_curves, but the second curve is given
+    by its CurveIndex, so every vertex of curve1 is a single batched query.
+
+    Parameters
+    ----------
+    curve1 : TYPE list of lists
+        DESCRIPTION. A curve (list of points)
+    curve_index2 : TYPE CurveIndex
+        DESCRIPTION. the index of the second curve
+
+    Returns
+    -------
+    TYPE list
+        DESCRIPTION. [point on curve1, point on curve2, distance]
+
+    """
+    vertex_index, distances = curve_index2.nearest_vertex(curve1)
+    i = int(np.argmin(distances))
+    return [curve1[i], curve_index2.vertices[vertex_index[i]].tolist(), float(distances[i])]
+
+
+# the dilutions of the points in a result of weld_steels_filler, in %
+RESULT_DILUTIONS = [0] + WELD_DILUTIONS
+
+
+def dilution_point(results_points, dilution):
+    """
+    Returns the point of any dilution from a result of weld_steels_filler.
+    All dilution points lie on the line from the filler (0%) to the 50% mixture
+    of the steels, so a dilution that is not stored is calculated exactly from
+    the filler point and the 50% dilution point, no rounding.
+
+    Parameters
+    ----------
+    results_points : TYPE list
+        DESCRIPTION. a result of weld_steels_filler, points for 0%-50% dilution
+    dilution : TYPE int or float
+        DESCRIPTION. dilution in %, 0 is the pure filler
+
+    Returns
+    -------
+    TYPE list
+        DESCRIPTION. the point of the weld metal with this dilution
+
+    """
+    if dilution in RESULT_DILUTIONS:
+        return results_points[RESULT_DILUTIONS.index(dilution)]
+    return mix_points(results_points[-1], results_points[0], 2 * dilution)
+
+
+class WeldResultStore:
+    """
+    A results_dict (see weld_steels_fillers) in one contiguous float array of
+    shape (fillers, dilutions, 2) instead of lists of lists, with the filler
+    names as index. It is used like a dict: store[name] returns the points of
+    a filler (a view into the array), store[name] = weld_steels_filler(...)
+    adds or replaces them. find_best_filler reads a whole dilution of all
+    fillers as one slice.
+
+    Parameters
+    ----------
+    dilutions : TYPE list
+        DESCRIPTION. the dilutions of the points of every filler, 0 (the
+                     filler) first and 50 last like RESULT_DILUTIONS
+    capacity : TYPE int
+        DESCRIPTION. number of fillers the array has room for, it is
+                     doubled when it is full
+
+    """
+
+    def __init__(self, dilutions=RESULT_DILUTIONS, capacity=16):
+        self.dilutions = list(dilutions)
+        self._data = np.empty((max(1, capacity), len(self.dilutions), 2))
+        self.names = []
+        self.index = {}
+
+    @property
+    def points(self):
+        """The points of all fillers, shape (fillers, dilutions, 2), a view."""
+        return self._data[:len(self.names)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, name):
+        return self._data[self.index[name]]
+
+    def __setitem__(self, name, points):
+        points = np.asarray(points, dtype=float)
+        if points.shape != self._data.shape[1:]:
+            raise ValueError(f"points of {name!r} have shape {points.shape}, expected {self._data.shape[1:]}")
+        row = self.index.get(name)
+        if row is None:
+            row = len(self.names)
+            if row == len(self._data):
+                # earlier views keep pointing to the old array
+                self._data = np.concatenate((self._data, np.empty_like(self._data)))
+            self.names.append(name)
+            self.index[name] = row
+        self._data[row] = points
+
+    def __delitem__(self, name):
+        row = self.index.pop(name)
+        del self.names[row]
+        self._data[row:len(self.names)] = self._data[row + 1:len(self.names) + 1]
+        for moved, moved_name in enumerate(self.names[row:], row):
+            self.index[moved_name] = moved
+
+    def keys(self):
+        return list(self.names)
+
+    def values(self):
+        return [self._data[row] for row in range(len(self.names))]
+
+    def items(self):
+        return [(name, self._data[row]) for row, name in enumerate(self.names)]
+
+    def get(self, name, default=None):
+        return self[name] if name in self.index else default
+
+    def dilution_points(self, dilution):
+        """
+        The points of all fillers with this dilution, shape (fillers, 2). A
+        stored dilution is a view, any other is calculated like dilution_point.
+        """
+        if dilution in self.dilutions:
+            return self.points[:, self.dilutions.index(dilution)]
+        return mix_point_arrays(self.points[:, -1], self.points[:, 0], 100 / self.dilutions[-1] * dilution)
+
+
 def find_best_filler(results_dict, curve, dilution):
     """
     Finds the best filler in a results_dict with a given dilution. It does not make
@@ -479,7 +1530,7 @@ def find_best_filler(results_dict, curve, dilution):
 
     Parameters
     ----------
-    results_dict : TYPE dict
+    results_dict : TYPE dict or WeldResultStore
         DESCRIPTION. A dictionary of results from weld_steels_filler, that 
                      consists of dilution points for 0%-50% and a filler name for 
                      the key.
@@ -489,11 +1540,11 @@ def find_best_filler(results_dict, curve, dilution):
                      Do we want our x%-dilution point near the center of the 
                      S-curve or near to one of the border curves of the S-curve?
                                           
-    dilution : TYPE int
+    dilution : TYPE int or float
         DESCRIPTION. number that denotes the dilution of filler and welding steels. 
-                     Currently, we only have 0, 10, 20, 25, 30, 35, 40, and 50. If the
-                     user enters a different number, we round to the nearest
-                     of these values
+                     For 0, 10, 20, 25, 30, 35, 40, and 50 the stored points are
+                     used, any other dilution is calculated on the line through
+                     the stored points, see dilution_point.
  
     Returns
     -------
@@ -506,179 +1557,2002 @@ def find_best_filler(results_dict, curve, dilution):
                      list[2] is their distance in the Schaeffler diagram.
 
     """
-    dilutions_list = [0, 10, 20, 25, 30, 35, 40, 50]
-    closest_value = min(dilutions_list, key = lambda x: abs(x-dilution))
-    # print(dilution, closest_value)
-    dilution = closest_value
-    
     result = 100000000
     distance = 100000000
     best_key = "best key"
+    INSTRUMENTATION.count("queries")
+    INSTRUMENTATION.count("curve points", len(curve))
+    if isinstance(results_dict, WeldResultStore):
+        return _find_best_filler_store(results_dict, curve, dilution)
     
-    # idx = dilution / 10 # in the results_dict, points are stored in order of dilution 0, 10, 20, 30, 40%
-    idx = dilutions_list.index(closest_value)
-        
-    for i,key in enumerate(results_dict):
-        distance_result_new = find_min_distance_point_to_curve(curve, results_dict[key][idx]) # we need a list otherwise error in find_distance_points
-        # print("***** ", distance_result_new)
-        if distance_result_new[2] <= distance:
-            distance = distance_result_new[2]
-            best_key = key
-            result = distance_result_new
+    with INSTRUMENTATION.stage("ranking"):
+        for i,key in enumerate(results_dict):
+            point = dilution_point(results_dict[key], dilution)
+            distance_result_new = find_min_distance_point_to_curve(curve, point) # we need a list otherwise error in find_distance_points
+            # print("***** ", distance_result_new)
+            if distance_result_new[2] <= distance:
+                distance = distance_result_new[2]
+                best_key = key
+                result = distance_result_new
     return best_key, result
 
 
-def plot_curve_points_list(points_list, style):
+def _find_best_filler_store(store, curve, dilution):
+    # find_best_filler for all fillers of a WeldResultStore at once, with the
+    # same distances as find_min_distance_point_to_curve and the same choice:
+    # the first nearest curve point, the last of equally good fillers
+    if len(store) == 0:
+        return "best key", 100000000
+    with INSTRUMENTATION.stage("ranking"):
+        points = store.dilution_points(dilution)
+        INSTRUMENTATION.count("distance evaluations", len(points) * len(curve))
+        curve_points = np.asarray(curve, dtype=float)
+        distances = np.sqrt((curve_points[None, :, 0] - points[:, None, 0]) ** 2
+                            + (curve_points[None, :, 1] - points[:, None, 1]) ** 2)
+        nearest = np.argmin(distances, axis=1)
+        nearest_distances = distances[np.arange(len(points)), nearest]
+        best = len(points) - 1 - np.argmin(nearest_distances[::-1])
+        if nearest_distances[best] > 100000000:
+            return "best key", 100000000
+    return store.names[best], [points[best].tolist(), curve[nearest[best]], float(nearest_distances[best])]
+
+
+def solve_dilution_at_curve(mix50_points, filler_points, curve, max_dilution=100):
     """
-    Plots a curve from a points_list. Segments are just straight lines.
+    Calculates the exact dilution at which the weld metal reaches a curve, for
+    example ferrite_10_percent_line or s_curve_left_border. The weld metal of
+    every filler moves on the line from the filler (0% dilution) to the 50%
+    point of the steels (100% dilution), as in weld_steels_filler. This line is
+    intersected with the segments of the curve, for all fillers at once.
 
     Parameters
     ----------
-    points_list : TYPE list
-        DESCRIPTION. List of coordinates in the S-diagram
-    style : TYPE string
-        DESCRIPTION. the usual matplotlib-strings for styles like "ro" for red
-                     circles
+    mix50_points : TYPE array-like
+        DESCRIPTION. 50% point of the steels, a single point or one per filler
+    filler_points : TYPE array-like
+        DESCRIPTION. points of the fillers, shape (n, 2), for example
+                     equivalent_points(filler_catalog)
+    curve : TYPE list of lists or CurveSegments
+        DESCRIPTION. the curve the weld metal should reach
+    max_dilution : TYPE float
+        DESCRIPTION. the highest dilution in % that is searched
 
     Returns
     -------
-    None.
+    dilutions : TYPE numpy array
+        DESCRIPTION. lowest dilution in % at which the curve is reached for
+                     every filler, nan if it is not reached up to max_dilution
+    crossing_points : TYPE numpy array
+        DESCRIPTION. the weld metal points on the curve, shape (n, 2)
 
     """
-    len_points_list = len(points_list)
-    for i,point in enumerate(points_list):
-        if i < len_points_list-1:
-            plot_line_points(points_list[i], points_list[i+1], style, 6)
-        else:
-            break
+    if not isinstance(curve, CurveSegments):
+        curve = CurveSegments(curve)
+    filler_points = np.asarray(filler_points, dtype=float).reshape(-1, 2)
+    mix50_points = np.asarray(mix50_points, dtype=float).reshape(-1, 2)
+    ends = mix_point_arrays(mix50_points, filler_points, max_dilution)
+    fraction, crossing_points, _ = curve.first_crossing(filler_points, ends)
+    return fraction * max_dilution, crossing_points
 
 
-######################### LET'S DEFINE SOME STEELS ############################
-# steels etc...
-steel_14723_avg_dict = {"name":"1.4723","C":0.12,  "Si":0.75, "Mn":1.0, 
-                        "Cr":7.0, "Al":0.75}
-steel_14021_avg_dict = {"name":"1.4021","C":0.205, "Si":0.5, "Mn":0.75, 
-                        "Cr":13.0, "Al":0.0}
-steel_A508_avg_dict = {"name":"A508","C":0.3, "Si":0.4, "Mn":1.35,  
-                        "Cr":0.0, "Mo": 0.1, "Ni": 0.4, "Al":0.0}
-steel_A304L_avg_dict = {"name":"A304L","C":0.03, "Si":1.0, "Mn":2.0,  
-                        "Cr":18.5, "Mo": 0.0, "Ni": 11.0, "Nb":0.01, "Al":0.0}
+def find_dilution_at_curve(results_dict, curve, max_dilution=100):
+    """
+    solve_dilution_at_curve for a results_dict of weld_steels_filler.
 
+    Returns
+    -------
+    TYPE dict
+        DESCRIPTION. the filler name as key and the dilution in % at which its
+                     weld metal reaches the curve (nan if never) as value
 
-# welding fillers etc
-bohler_Thermanit2509CuT_avg_dict = {"name":"Thermanit2509CuT","C":0.02, 
-                                    "Si":0.35, "Mn":0.9, "Cr":25.5, "Ni":9.5,
-                                    "Mo":3.8, "W":0.6}
-bohler_ThermanitJE308LSi_dict = {"name":"ThermanitJE308LSi","C":0.02, "Si":0.9,
-                                 "Mn":1.7, "Cr":20, "Ni":10}
-bohler_FOXCN2312MoA_dict = {"name":"FOXCN2312MoA","C":0.02, "Si":0.7, "Mn":0.8,
-                            "Cr":23.0, "Ni":12.5, "Mo":2.7}
-bohler_EMK8_dict = {"name":"EMK8","C":0.1, "Si":1.0, "Mn":1.7}
-bohler_UnionIMoMn_dict = {"name":"UnionIMoMn","C":0.09, "Si":0.65, "Mn":1.8, 
-                          "Mo":0.52}
-bohler_UnionICrMo910_dict = {"name":"UnionICrMo910","C":0.07, "Si":0.60, "Mn":1.0, 
-                          "Cr": 2.55, "Mo":1.0}
-bohler_Thermanit1605Mo_dict = {"name":"Thermanit1605Mo","C":0.02, "Si":0.35, 
-                               "Mn":1.3, "Cr": 16, "Ni": 5.5, "Mo": 1.0}
-bohler_CAT430LCbIG_dict = {"name":"CAT430LCbIG","C":0.02, "Si":0.5, "Mn":0.5, 
-                          "Cr": 18, "Nb": 0.24}
-bohler_ThermanitGE316LCryo_dict = {"name":"ThermanitGE316LCryo","C":0.02, 
-                                   "Si":0.35, "Mn":1.8, "Cr": 18.5, "Ni": 12.3,
-                                   "Mo": 2.8}
-filler_308L_dict = {"name":"308L","C":0.04, "Si":1.0, "Mn":1.25, "Cr":19.5, 
-                    "Mo": 0.75, "Ni": 10.5, "Nb":0.0, "Al":0.0}
+    """
+    names = list(results_dict)
+    filler_points = [results_dict[name][0] for name in names]
+    # the 50% dilution point is halfway between the filler and the steels
+    mix50_points = [mix_points(results_dict[name][-1], results_dict[name][0], 200) for name in names]
+    dilutions, _ = solve_dilution_at_curve(mix50_points, filler_points, curve, max_dilution)
+    return dict(zip(names, dilutions.tolist()))
+
+
+class PairFillerScreening:
+    """
+    Weld metal points of every base-metal pair of a catalog welded with every
+    filler of a second catalog, for a list of dilutions. Built by
+    screen_pairs_fillers.
+
+    Attributes
+    ----------
+    pairs : TYPE numpy array
+        DESCRIPTION. indices of the two base metals of every pair, shape (P, 2)
+    pair_names : TYPE list
+        DESCRIPTION. (name1, name2) for every pair
+    filler_names : TYPE list
+        DESCRIPTION. names of the M fillers
+    dilutions : TYPE numpy array
+        DESCRIPTION. the D dilutions in %
+    points : TYPE numpy array
+        DESCRIPTION. weld metal points, shape (P, M, D, 2), the last axis is
+                     [Cr-equivalent, Ni-equivalent]
+    diagram : TYPE ConstitutionDiagram or None
+        DESCRIPTION. the diagram the equivalents were calculated with, its
+                     curves can be given by key (for example 10); without a
+                     diagram the keys are those of the Schaeffler diagram
+
+    """
+
+    def __init__(self, pairs, pair_names, filler_names, dilutions, points, diagram=None):
+        self.pairs = pairs
+        self.pair_names = pair_names
+        self.filler_names = filler_names
+        self.dilutions = dilutions
+        self.points = points
+        self.diagram = diagram
+
+    def _segments(self, curve):
+        # CurveSegments of a curve given as points, segments or a key of the
+        # diagram's curves (the Schaeffler diagram's without a diagram)
+        if isinstance(curve, (str, int, float)):
+            return (self.diagram or get_diagram()).segments(curve)
+        if isinstance(curve, CurveSegments):
+            return curve
+        return CurveSegments(curve)
+
+    def distances(self, curve):
+        """
+        Distances of all weld metal points to a curve (list of points,
+        CurveSegments or the key of a curve of the diagram), measured to the
+        segments of the curve, shape (P, M, D).
+        """
+        curve = self._segments(curve)
+        with INSTRUMENTATION.stage("distance"):
+            _, _, distances = curve.nearest(self.points.reshape(-1, 2))
+        return distances.reshape(self.points.shape[:-1])
+
+    def enters_phase(self, phase="M", dilution_range=(20, 40), region_index=None):
+        """
+        Tests for every pair and filler whether a weld metal point with a
+        dilution within dilution_range lies in a region with the phase (by
+        default martensite: M, A+M, M+F, A+M+F), shape (P, M).
+        """
+        if region_index is None:
+            region_index = (self.diagram or get_diagram()).region_index()
+        selected = (self.dilutions >= dilution_range[0]) & (self.dilutions <= dilution_range[1])
+        points = self.points[:, :, selected, :]
+        return region_index.contains_phase(points.reshape(-1, 2), phase).reshape(points.shape[:-1]).any(axis=2)
+
+    def best_fillers(self, curves, rejected=None):
+        """
+        Finds the best filler of every pair for every target curve (for example
+        ferrite_5_percent_line, ferrite_10_percent_line) and every dilution.
+
+        Parameters
+        ----------
+        curves : TYPE list
+            DESCRIPTION. T curves (lists of points, CurveSegments or keys of
+                         the diagram's curves) we measure the distance to
+        rejected : TYPE numpy array
+            DESCRIPTION. optional, True for fillers that must not be chosen
+                         for a pair, shape (P, M), for example the result of
+                         enters_phase("M"); their distances are not calculated
+                         and are inf, a pair without any allowed filler gets
+                         best_index 0 and distance inf
+
+        Returns
+        -------
+        best_index : TYPE numpy array
+            DESCRIPTION. index of the best filler, shape (P, T, D)
+        best_names : TYPE numpy array
+            DESCRIPTION. name of the best filler, shape (P, T, D)
+        best_distances : TYPE numpy array
+            DESCRIPTION. distance of the best filler's point, shape (P, T, D)
+
+        """
+        with INSTRUMENTATION.stage("ranking"):
+            if rejected is None:
+                distances = np.stack([self.distances(curve) for curve in curves], axis=1)
+            else:
+                allowed = ~np.asarray(rejected, dtype=bool)
+                allowed_points = self.points[allowed]
+                distances = np.full((len(self.pairs), len(curves)) + self.points.shape[1:3], np.inf)
+                for t, curve in enumerate(curves):
+                    curve = self._segments(curve)
+                    with INSTRUMENTATION.stage("distance"):
+                        _, _, allowed_distances = curve.nearest(allowed_points.reshape(-1, 2))
+                    distances[:, t][allowed] = allowed_distances.reshape(allowed_points.shape[:-1])
+            best_index = np.argmin(distances, axis=2)
+            best_distances = np.take_along_axis(distances, best_index[:, :, None, :], axis=2)[:, :, 0, :]
+            best_names = np.asarray(self.filler_names, dtype=object)[best_index]
+        return best_index, best_names, best_distances
+
+
+def screen_pairs_fillers(base_catalog, filler_catalog, dilutions=(10, 20, 25, 30, 35, 40, 50),
+                         include_same=False, diagram=None):
+    """
+    Performs the calculation of weld_steels_filler for every pair of base
+    metals in base_catalog and every filler in filler_catalog at once: the
+    50% point of the two base metals is connected with the filler and the
+    dilution points on that line are calculated with mix_points.
+
+    Parameters
+    ----------
+    base_catalog : TYPE AlloyCatalog
+        DESCRIPTION. the N base metals, every pair of them is screened
+    filler_catalog : TYPE AlloyCatalog
+        DESCRIPTION. the M fillers
+    dilutions : TYPE sequence
+        DESCRIPTION. the D dilutions in % we want the weld metal points of
+    include_same : TYPE bool
+        DESCRIPTION. if True, a base metal welded to itself is a pair, too
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. optional, the diagram (or its registered name) whose
+                     equivalents are used, default are the Schaeffler formulas
+
+    Returns
+    -------
+    TYPE PairFillerScreening
+        DESCRIPTION. the weld metal points of shape (pairs, fillers, dilutions, 2)
+
+    """
+    if diagram is None:
+        base_points = equivalent_points(base_catalog)
+        filler_points = equivalent_points(filler_catalog)
+    else:
+        diagram = get_diagram(diagram)
+        base_points = diagram.equivalent_points(base_catalog)
+        filler_points = diagram.equivalent_points(filler_catalog)
+    first, second = np.triu_indices(len(base_catalog), k=0 if include_same else 1)
+    mix50_points = mix_point_arrays(base_points[first], base_points[second], 50)
+    dilutions = np.asarray(dilutions, dtype=float)
+    with INSTRUMENTATION.stage("dilution points"):
+        points = mix_point_arrays(mix50_points[:, None, None, :], filler_points[None, :, None, :], dilutions)
+    INSTRUMENTATION.count("dilution points", points.size // 2)
+    pair_names = [(base_catalog.names[i], base_catalog.names[j]) for i, j in zip(first, second)]
+    return PairFillerScreening(np.column_stack((first, second)), pair_names,
+                               list(filler_catalog.names), dilutions, points, diagram)
+
+
+class IncrementalScreen:
+    """
+    The best filler of every base-metal pair for target curves and dilutions,
+    like PairFillerScreening.best_fillers, kept up to date while the
+    compositions change. Every distance depends on one pair (both of its base
+    metals) and one filler: correcting a base metal recalculates the pairs it
+    belongs to, adding or correcting a filler recalculates its column, and
+    the best fillers are updated in place. Only cells whose best filler got
+    worse or was removed are searched again over all fillers.
+
+    Parameters
+    ----------
+    base_dicts : TYPE list
+        DESCRIPTION. metal_dicts of the base metals, every pair of them is
+                     screened
+    filler_dicts : TYPE list
+        DESCRIPTION. metal_dicts of the fillers
+    curves : TYPE list
+        DESCRIPTION. T target curves, keys of the diagram's curves (for
+                     example 10 or "s_curve_center") or lists of points
+    dilutions : TYPE sequence
+        DESCRIPTION. the D dilutions in %
+    include_same : TYPE bool
+        DESCRIPTION. if True, a base metal welded to itself is a pair, too
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. the diagram (or its registered name)
+
+    Attributes
+    ----------
+    distances : TYPE numpy array
+        DESCRIPTION. distances of the weld metal points to the curves,
+                     shape (P, T, M, D)
+    best_index : TYPE numpy array
+        DESCRIPTION. index of the best filler, shape (P, T, D), the first
+                     one of equally good fillers like np.argmin
+    best_distances : TYPE numpy array
+        DESCRIPTION. distance of the best filler's point, shape (P, T, D)
+
+    """
+
+    def __init__(self, base_dicts, filler_dicts, curves, dilutions=WELD_DILUTIONS, include_same=False,
+                 diagram="Schaeffler"):
+        self.diagram = get_diagram(diagram)
+        self.curves = list(curves)
+        self._segments = [self.diagram.segments(curve) if isinstance(curve, (str, int, float))
+                          else CurveSegments(curve) for curve in self.curves]
+        self.dilutions = np.asarray(dilutions, dtype=float)
+        self.include_same = include_same
+        self.base_names = [get_value(metal_dict, "name") for metal_dict in base_dicts]
+        self.base_points = self.diagram.equivalent_points(AlloyCatalog.from_dicts(base_dicts)).reshape(-1, 2)
+        self.filler_names = [get_value(metal_dict, "name") for metal_dict in filler_dicts]
+        self.filler_points = self.diagram.equivalent_points(AlloyCatalog.from_dicts(filler_dicts)).reshape(-1, 2)
+        first, second = np.triu_indices(len(self.base_names), k=0 if include_same else 1)
+        self.pairs = np.column_stack((first, second))
+        self.distances = self._distances(self.pairs, self.filler_points)
+        self.best_index = np.argmin(self.distances, axis=2)
+        self.best_distances = np.take_along_axis(self.distances, self.best_index[:, :, None, :], axis=2)[:, :, 0, :]
+
+    @property
+    def pair_names(self):
+        """(name1, name2) for every pair."""
+        return [(self.base_names[i], self.base_names[j]) for i, j in self.pairs.tolist()]
+
+    @property
+    def best_names(self):
+        """Name of the best filler, shape (P, T, D)."""
+        return np.asarray(self.filler_names, dtype=object)[self.best_index]
+
+    def pair_index(self, base1, base2):
+        """The row of the pair of the base metals base1 and base2 (names, in any order)."""
+        i, j = self.base_names.index(base1), self.base_names.index(base2)
+        rows = np.flatnonzero(((self.pairs[:, 0] == i) & (self.pairs[:, 1] == j))
+                              | ((self.pairs[:, 0] == j) & (self.pairs[:, 1] == i)))
+        if len(rows) == 0:
+            raise KeyError(f"no pair {base1!r}, {base2!r}")
+        return int(rows[0])
+
+    def _distances(self, pairs, filler_points):
+        """Distances of the weld metal points of pairs and fillers, shape (len(pairs), T, len(fillers), D)."""
+        base_points = self.base_points
+        mix50_points = mix_point_arrays(base_points[pairs[:, 0]], base_points[pairs[:, 1]], 50)
+        points = mix_point_arrays(mix50_points[:, None, None, :], filler_points[None, :, None, :], self.dilutions)
+        INSTRUMENTATION.count("recalculated points", points.size // 2 * len(self._segments))
+        distances = np.empty((len(pairs), len(self._segments)) + points.shape[1:3])
+        with INSTRUMENTATION.stage("distance"):
+            for t, segments in enumerate(self._segments):
+                _, _, curve_distances = segments.nearest(points.reshape(-1, 2))
+                distances[:, t] = curve_distances.reshape(points.shape[:-1])
+        return distances
+
+    def _search_again(self, cells):
+        """Finds the best filler of the cells (True in a (P, T, D) mask) over all fillers."""
+        p, t, d = np.nonzero(cells)
+        if len(p):
+            candidates = self.distances[p, t, :, d]
+            self.best_index[p, t, d] = np.argmin(candidates, axis=1)
+            self.best_distances[p, t, d] = candidates.min(axis=1)
+
+    def set_base(self, metal_dict):
+        """
+        Adds a base metal or corrects the composition of one, the pairs it
+        belongs to are recalculated.
+        """
+        name = get_value(metal_dict, "name")
+        point = np.array(self.diagram.equivalents(metal_dict), dtype=float)
+        if name in self.base_names:
+            b = self.base_names.index(name)
+            self.base_points[b] = point
+            rows = np.flatnonzero((self.pairs == b).any(axis=1))
+            distances = self._distances(self.pairs[rows], self.filler_points)
+            self.distances[rows] = distances
+        else:
+            b = len(self.base_names)
+            self.base_names.append(name)
+            self.base_points = np.vstack((self.base_points, point))
+            others = np.arange(b + 1 if self.include_same else b)
+            new_pairs = np.column_stack((others, np.full(len(others), b)))
+            rows = np.arange(len(self.pairs), len(self.pairs) + len(new_pairs))
+            distances = self._distances(new_pairs, self.filler_points)
+            self.pairs = np.vstack((self.pairs, new_pairs))
+            self.distances = np.concatenate((self.distances, distances))
+            self.best_index = np.concatenate((self.best_index, np.zeros((len(rows),) + self.best_index.shape[1:], int)))
+            self.best_distances = np.concatenate((self.best_distances, np.zeros((len(rows),) + self.best_distances.shape[1:])))
+        self.best_index[rows] = np.argmin(distances, axis=2)
+        self.best_distances[rows] = distances.min(axis=2)
+
+    def remove_base(self, name):
+        """Removes a base metal and its pairs."""
+        b = self.base_names.index(name)
+        kept = ~(self.pairs == b).any(axis=1)
+        del self.base_names[b]
+        self.base_points = np.delete(self.base_points, b, axis=0)
+        self.pairs = self.pairs[kept] - (self.pairs[kept] > b)
+        self.distances = self.distances[kept]
+        self.best_index = self.best_index[kept]
+        self.best_distances = self.best_distances[kept]
+
+    def set_filler(self, metal_dict):
+        """
+        Adds a filler or corrects the composition of one, its column is
+        recalculated and the best fillers are updated.
+        """
+        name = get_value(metal_dict, "name")
+        point = np.array(self.diagram.equivalents(metal_dict), dtype=float)
+        column = self._distances(self.pairs, point[None, :])[:, :, 0, :]
+        if name in self.filler_names:
+            m = self.filler_names.index(name)
+            self.filler_points[m] = point
+            self.distances[:, :, m, :] = column
+            # where the filler was the best one and got worse, all fillers are
+            # searched again; everywhere else it is compared with the old best
+            old_best_distances = self.best_distances.copy()
+            was_best = self.best_index == m
+            worse = was_best & (column > old_best_distances)
+            self._search_again(worse)
+            better = ~worse & (was_best | (column < old_best_distances)
+                               | ((column == old_best_distances) & (m < self.best_index)))
+        else:
+            m = len(self.filler_names)
+            self.filler_names.append(name)
+            self.filler_points = np.vstack((self.filler_points, point))
+            self.distances = np.concatenate((self.distances, column[:, :, None, :]), axis=2)
+            # the new filler comes last, it has to be strictly better
+            better = column < self.best_distances
+        self.best_index[better] = m
+        self.best_distances[better] = column[better]
+
+    def remove_filler(self, name):
+        """Removes a filler, the cells it was the best filler of are searched again."""
+        m = self.filler_names.index(name)
+        del self.filler_names[m]
+        self.filler_points = np.delete(self.filler_points, m, axis=0)
+        self.distances = np.delete(self.distances, m, axis=2)
+        was_best = self.best_index == m
+        self.best_index[self.best_index > m] -= 1
+        self._search_again(was_best)
+
+
+def top_k_fillers(scores, k, axis=-1):
+    """
+    Finds the k smallest scores along an axis without sorting all of them
+    (np.argpartition, only the k selected are sorted).
+
+    Parameters
+    ----------
+    scores : TYPE numpy array
+        DESCRIPTION. for example distances of shape (P, M, D) with the
+                     fillers on axis 1, NaN counts as inf
+    k : TYPE int
+        DESCRIPTION. number of fillers, at most the length of the axis
+    axis : TYPE int
+        DESCRIPTION. the axis of the fillers
+
+    Returns
+    -------
+    top_index : TYPE numpy array
+        DESCRIPTION. index of the k best fillers, best first, the axis has
+                     length k; of equal scores the lower index comes first,
+                     like a stable sort
+    top_scores : TYPE numpy array
+        DESCRIPTION. their scores
+
+    """
+    scores = np.moveaxis(np.asarray(scores, dtype=float), axis, -1)
+    scores = np.where(np.isnan(scores), np.inf, scores)
+    k = min(k, scores.shape[-1])
+    if k < scores.shape[-1]:
+        # the k-th smallest score, all smaller ones are taken and of the
+        # equal ones those with the lowest index
+        kth = np.take_along_axis(scores, np.argpartition(scores, k - 1, axis=-1)[..., k - 1:k], axis=-1)
+        smaller = scores < kth
+        equal = scores == kth
+        needed = k - np.count_nonzero(smaller, axis=-1, keepdims=True)
+        selected = smaller | (equal & (np.cumsum(equal, axis=-1) <= needed))
+        candidates = np.nonzero(selected)[-1].reshape(scores.shape[:-1] + (k,))
+    else:
+        candidates = np.broadcast_to(np.arange(k), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    # best first, equal scores by index
+    order = np.lexsort((candidates, candidate_scores), axis=-1)
+    top_index = np.take_along_axis(candidates, order, axis=-1)
+    top_scores = np.take_along_axis(candidate_scores, order, axis=-1)
+    return np.moveaxis(top_index, -1, axis), np.moveaxis(top_scores, -1, axis)
+
+
+def pareto_front(objectives, chunk_size=2**20):
+    """
+    Finds the fillers no other filler is better than in every objective (all
+    objectives are minimized): a filler is dominated if another one is at
+    least as good in all objectives and better in one.
+
+    Parameters
+    ----------
+    objectives : TYPE numpy array
+        DESCRIPTION. shape (..., M, C), C objectives of M fillers
+    chunk_size : TYPE int
+        DESCRIPTION. number of filler/filler/objective combinations at once,
+                     taken from all groups (...) together
+
+    Returns
+    -------
+    TYPE numpy array
+        DESCRIPTION. True for the fillers on the Pareto front, shape (..., M)
+
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    fillers, criteria = objectives.shape[-2:]
+    flat = objectives.reshape((int(np.prod(objectives.shape[:-2])), fillers, criteria))
+    # one row per group and filler, every row is compared with all fillers
+    # of its group
+    rows = flat.reshape(-1, criteria)
+    dominated = np.zeros(len(rows), dtype=bool)
+    rows_per_chunk = max(1, chunk_size // max(fillers * criteria, 1))
+    for start in range(0, len(rows), rows_per_chunk):
+        chunk = rows[start:start + rows_per_chunk, None, :]
+        others = flat[np.arange(start, start + len(chunk)) // fillers]
+        dominated[start:start + len(chunk)] = (np.all(others <= chunk, axis=2)
+                                               & np.any(others < chunk, axis=2)).any(axis=1)
+    return ~dominated.reshape(objectives.shape[:-1])
+
+
+class FillerRanking:
+    """
+    Several criteria of every filler of a PairFillerScreening and the
+    rankings built from them, made by rank_fillers.
+
+    Attributes
+    ----------
+    objective_names : TYPE list
+        DESCRIPTION. names of the C objectives, all of them are minimized
+    objectives : TYPE numpy array
+        DESCRIPTION. the objectives, shape (P, M, C)
+    scores : TYPE numpy array
+        DESCRIPTION. weighted sum of the objectives, shape (P, M)
+    top_index : TYPE numpy array
+        DESCRIPTION. index of the k best fillers by score, best first, (P, k)
+    top_names : TYPE numpy array
+        DESCRIPTION. their names, shape (P, k)
+    pareto : TYPE numpy array
+        DESCRIPTION. True for fillers on the Pareto front, shape (P, M)
+
+    """
+
+    def __init__(self, filler_names, objective_names, objectives, scores, top_index, pareto):
+        self.filler_names = filler_names
+        self.objective_names = objective_names
+        self.objectives = objectives
+        self.scores = scores
+        self.top_index = top_index
+        self.top_names = np.asarray(filler_names, dtype=object)[top_index]
+        self.pareto = pareto
+
+    def pareto_names(self, pair=0):
+        """Names of the fillers on the Pareto front of a pair."""
+        return [name for name, on_front in zip(self.filler_names, self.pareto[pair]) if on_front]
+
+
+def rank_fillers(screening, target, k=5, dilutions=(20, 25, 30), borders=("s_curve_left_border", "s_curve_right_border"),
+                 margin_dilutions=(20, 40), costs=None, weights=None):
+    """
+    Ranks the fillers of a PairFillerScreening by several criteria at once:
+
+        distance 20% ...   distance of the weld metal to target at every
+                           dilution of dilutions
+        S-curve margin     how far the weld metal at margin_dilutions stays
+                           inside the S-curve borders (negative outside), the
+                           objective is -margin
+        cost               costs of the fillers, if given
+
+    The objectives are calculated once for all pairs and fillers, the top k
+    by weighted score and the Pareto front come from the same array.
+
+    Parameters
+    ----------
+    screening : TYPE PairFillerScreening
+        DESCRIPTION. the weld metal points, its dilutions must contain all
+                     dilutions and margin_dilutions
+    target : TYPE list, CurveSegments or curve key
+        DESCRIPTION. the curve we aim for, for example ferrite_10_percent_line
+    k : TYPE int
+        DESCRIPTION. length of the shortlist
+    dilutions : TYPE sequence
+        DESCRIPTION. dilutions in % the distance to target is measured at
+    borders : TYPE tuple
+        DESCRIPTION. (left border, right border) of the S-curve, curves or
+                     keys of the Schaeffler diagram, None for no margin
+    margin_dilutions : TYPE tuple
+        DESCRIPTION. (lowest, highest) dilution the margin is measured for
+    costs : TYPE sequence
+        DESCRIPTION. optional, cost of every filler, in the score with
+                     weight 1 like the other objectives unless weights gives
+                     another one (scale it to the distances)
+    weights : TYPE dict
+        DESCRIPTION. optional, objective name as key and its weight in the
+                     score as value, missing objectives have weight 1
+
+    Returns
+    -------
+    TYPE FillerRanking
+        DESCRIPTION. objectives, scores, top k and Pareto front
+
+    """
+    def segments_of(curve):
+        if isinstance(curve, CurveSegments):
+            return curve
+        if isinstance(curve, (str, int, float)):
+            return (screening.diagram or get_diagram()).segments(curve)
+        return CurveSegments(curve)
+
+    def dilution_columns(values):
+        columns = [np.flatnonzero(screening.dilutions == value) for value in values]
+        missing = [value for value, column in zip(values, columns) if len(column) == 0]
+        if missing:
+            raise ValueError(f"the screening has no points for the dilutions {missing}")
+        return [column[0] for column in columns]
+
+    names = []
+    objectives = []
+    points = screening.points
+    columns = dilution_columns(list(dilutions))
+    _, _, distances = segments_of(target).nearest(points[:, :, columns].reshape(-1, 2))
+    distances = distances.reshape(points.shape[0], points.shape[1], len(columns))
+    for c, dilution in enumerate(dilutions):
+        names.append(f"distance {dilution:g}%")
+        objectives.append(distances[:, :, c])
+    if borders is not None:
+        selected = ((screening.dilutions >= margin_dilutions[0]) & (screening.dilutions <= margin_dilutions[1]))
+        margin_points = points[:, :, selected].reshape(-1, 2)
+        left = segments_of(borders[0]).signed_distances(margin_points)
+        right = segments_of(borders[1]).signed_distances(margin_points)
+        margin = np.minimum(left, -right).reshape(points.shape[0], points.shape[1], -1).min(axis=2)
+        names.append("S-curve margin")
+        objectives.append(-margin)
+    if costs is not None:
+        names.append("cost")
+        objectives.append(np.broadcast_to(np.asarray(costs, dtype=float), points.shape[:2]))
+    objectives = np.stack(objectives, axis=2)
+    weights = weights or {}
+    weight_vector = np.array([weights.get(name, 1.0) for name in names])
+    scores = objectives @ weight_vector
+    top_index, _ = top_k_fillers(scores, k, axis=1)
+    return FillerRanking(list(screening.filler_names), names, objectives, scores, top_index,
+                         pareto_front(objectives))
+
+
+class WeldPass:
+    """
+    One bead of a multi-pass weld. The bead is the filler diluted into its
+    sources, equal parts of every source. A source is the name of a base metal
+    or the index of an earlier pass of the sequence.
+
+    Parameters
+    ----------
+    sources : TYPE list
+        DESCRIPTION. base metal names (string) and/or indices of earlier
+                     passes (int) the bead dilutes into
+    dilution : TYPE float
+        DESCRIPTION. dilution of the bead in %
+    name : TYPE string
+        DESCRIPTION. optional, for example "root" or "cap"
+
+    """
+
+    def __init__(self, sources, dilution, name=None):
+        self.sources = list(sources)
+        self.dilution = dilution
+        self.name = name
+
+
+class MultiPassPlan:
+    """
+    Weld metal of every pass of a multi-pass weld for every filler, built by
+    plan_weld_passes.
+
+    Attributes
+    ----------
+    pass_names : TYPE list
+        DESCRIPTION. the names of the K passes
+    filler_names : TYPE list
+        DESCRIPTION. the names of the M fillers
+    points : TYPE numpy array
+        DESCRIPTION. weld metal points, shape (K, M, 2)
+    ferrite : TYPE numpy array or None
+        DESCRIPTION. ferrite in % of every point, shape (K, M), if a
+                     FerriteField was given
+    distances : TYPE dict
+        DESCRIPTION. name of a curve as key, distances of all points to it
+                     of shape (K, M) as value
+    regions : TYPE numpy array or None
+        DESCRIPTION. name of the phase region of every point, shape (K, M),
+                     if a RegionIndex was given
+
+    """
+
+    def __init__(self, pass_names, filler_names, points, ferrite=None, distances=None, regions=None):
+        self.pass_names = pass_names
+        self.filler_names = filler_names
+        self.points = points
+        self.ferrite = ferrite
+        self.distances = distances if distances is not None else {}
+        self.regions = regions
+
+
+def plan_weld_passes(base_dicts, passes, filler_catalog, ferrite_field=None, curves=None,
+                     diagram=None, region_index=None):
+    """
+    Propagates the weld metal pass by pass through a multi-pass weld, for all
+    fillers of a catalog at once. Every pass is calculated like
+    weld_steels_filler does: the mixture of its sources is connected with the
+    filler and the point with the pass' dilution is taken.
+
+    Parameters
+    ----------
+    base_dicts : TYPE list
+        DESCRIPTION. metal_dicts of the base metals, referenced by their name
+    passes : TYPE list
+        DESCRIPTION. the WeldPass sequence, in welding order
+    filler_catalog : TYPE AlloyCatalog
+        DESCRIPTION. the candidate fillers
+    ferrite_field : TYPE FerriteField
+        DESCRIPTION. optional, to calculate the ferrite of every pass
+    curves : TYPE dict
+        DESCRIPTION. optional, a name as key and a curve as value, for
+                     example {"s_curve_left_border": s_curve_left_border}, the
+                     distances of every pass to these curves are calculated
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. optional, the diagram (or its registered name) whose
+                     equivalents are used and whose curves can be given by
+                     key (for example {"10%": 10}), default are the
+                     Schaeffler formulas and curves
+    region_index : TYPE RegionIndex
+        DESCRIPTION. optional, to label every pass with its phase region, for
+                     example get_diagram().region_index()
+
+    Returns
+    -------
+    TYPE MultiPassPlan
+        DESCRIPTION. points (and ferrite, distances, regions) of shape
+                     (passes, fillers)
+
+    """
+    if diagram is None:
+        base_points = {get_value(base_dict, "name"): np.array([Cr_equivalent(base_dict), Ni_equivalent(base_dict)])
+                       for base_dict in base_dicts}
+        filler_points = equivalent_points(filler_catalog)
+    else:
+        diagram = get_diagram(diagram)
+        base_points = {get_value(base_dict, "name"): np.array(diagram.equivalents(base_dict))
+                       for base_dict in base_dicts}
+        filler_points = diagram.equivalent_points(filler_catalog)
+    points = np.empty((len(passes), len(filler_points), 2))
+    for k, weld_pass in enumerate(passes):
+        sources = []
+        for source in weld_pass.sources:
+            if isinstance(source, str):
+                sources.append(np.broadcast_to(base_points[source], filler_points.shape))
+            elif 0 <= source < k:
+                sources.append(points[source])
+            else:
+                raise ValueError(f"pass {k} can only dilute into earlier passes, not {source}")
+        points[k] = mix_point_arrays(np.mean(sources, axis=0), filler_points, weld_pass.dilution)
+    pass_names = [weld_pass.name if weld_pass.name is not None else f"pass {k + 1}"
+                  for k, weld_pass in enumerate(passes)]
+    ferrite = None
+    if ferrite_field is not None:
+        ferrite = ferrite_field.ferrite(points.reshape(-1, 2)).reshape(points.shape[:2])
+    distances = {}
+    for curve_name, curve in (curves or {}).items():
+        if isinstance(curve, (str, int, float)):
+            curve = (diagram or get_diagram()).segments(curve)
+        elif not isinstance(curve, CurveSegments):
+            curve = CurveSegments(curve)
+        distances[curve_name] = curve.nearest(points.reshape(-1, 2))[2].reshape(points.shape[:2])
+    regions = None
+    if region_index is not None:
+        regions = region_index.classify(points.reshape(-1, 2)).reshape(points.shape[:2])
+    return MultiPassPlan(pass_names, list(filler_catalog.names), points, ferrite, distances, regions)
+
+
+class FerriteField:
+    """
+    Ferrite percentage on a regular grid over the Schaeffler diagram,
+    interpolated once between iso-ferrite lines like ferrite_0_percent_line ...
+    ferrite_40_percent_line. Afterwards the ferrite content of any point is a
+    bilinear lookup in the grid. Points on the austenitic side of the lowest
+    line get the lowest percentage, points beyond the highest line the highest
+    percentage.
+
+    Use FerriteField.build to create the grid from the lines,
+    FerriteField.cached to keep it in a file between runs.
+
+    Attributes
+    ----------
+    grid : TYPE numpy array
+        DESCRIPTION. ferrite in %, shape (len(Ni-values), len(Cr-values))
+    cr_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Cr-equivalent of the grid
+    ni_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Ni-equivalent of the grid
+    error_bound : TYPE float
+        DESCRIPTION. largest deviation in % of the field from the source lines,
+                     measured at the vertices of the lines
+
+    """
+
+    def __init__(self, grid, cr_range, ni_range, error_bound=math.nan, key=""):
+        self.grid = np.asarray(grid, dtype=float)
+        self.cr_range = (float(cr_range[0]), float(cr_range[1]))
+        self.ni_range = (float(ni_range[0]), float(ni_range[1]))
+        self.error_bound = float(error_bound)
+        self.key = key
+        self.cr_step = (self.cr_range[1] - self.cr_range[0]) / (self.grid.shape[1] - 1)
+        self.ni_step = (self.ni_range[1] - self.ni_range[0]) / (self.grid.shape[0] - 1)
+
+    @staticmethod
+    def _key(iso_lines, resolution, cr_range, ni_range):
+        # identifies the lines and grid a field was built from, for the cache
+        digest = hashlib.sha1()
+        for level in sorted(iso_lines):
+            digest.update(np.float64(level).tobytes())
+            digest.update(np.asarray(iso_lines[level], dtype=float).tobytes())
+        digest.update(np.asarray([resolution, *cr_range, *ni_range], dtype=float).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, iso_lines, resolution=0.1, cr_range=(0, 36), ni_range=(0, 28)):
+        """
+        Interpolates the ferrite percentage between iso-ferrite lines.
+
+        Parameters
+        ----------
+        iso_lines : TYPE dict
+            DESCRIPTION. the ferrite percentage as key and its line (list of
+                         points) as value, for example
+                         {0: ferrite_0_percent_line, 5: ferrite_5_percent_line}
+        resolution : TYPE float
+            DESCRIPTION. grid spacing in % of Cr- and Ni-equivalent
+        cr_range : TYPE tuple
+            DESCRIPTION. (lowest, highest) Cr-equivalent of the grid
+        ni_range : TYPE tuple
+            DESCRIPTION. (lowest, highest) Ni-equivalent of the grid
+
+        Returns
+        -------
+        TYPE FerriteField
+            DESCRIPTION. the field, with its error_bound against the lines
+
+        """
+        levels = sorted(iso_lines)
+        if len(levels) < 2:
+            raise ValueError("at least two iso-ferrite lines are needed")
+        cr_values = np.linspace(cr_range[0], cr_range[1], int(round((cr_range[1] - cr_range[0]) / resolution)) + 1)
+        ni_values = np.linspace(ni_range[0], ni_range[1], int(round((ni_range[1] - ni_range[0]) / resolution)) + 1)
+        cr_grid, ni_grid = np.meshgrid(cr_values, ni_values)
+        nodes = np.column_stack((cr_grid.ravel(), ni_grid.ravel()))
+
+        # signed distance of every node to every line, positive on the side
+        # with more ferrite (to the right of / below the lines)
+        signed = np.empty((len(levels), len(nodes)))
+        for k, level in enumerate(levels):
+            signed[k] = CurveSegments(iso_lines[level]).signed_distances(nodes)
+
+        # between the last line a node lies beyond and the next one we
+        # interpolate linearly with the distances to both lines
+        levels_array = np.asarray(levels, dtype=float)
+        beyond = np.count_nonzero(signed >= 0, axis=0)
+        lower = np.clip(beyond - 1, 0, len(levels) - 2)
+        columns = np.arange(len(nodes))
+        distance_lower = signed[lower, columns]
+        distance_upper = -signed[lower + 1, columns]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = distance_lower / (distance_lower + distance_upper)
+        weight = np.clip(np.nan_to_num(weight), 0.0, 1.0)
+        ferrite = levels_array[lower] + (levels_array[lower + 1] - levels_array[lower]) * weight
+        ferrite[beyond == 0] = levels_array[0]
+        ferrite[beyond == len(levels)] = levels_array[-1]
+
+        field = cls(ferrite.reshape(cr_grid.shape), cr_range, ni_range,
+                    key=cls._key(iso_lines, resolution, cr_range, ni_range))
+        field.error_bound = field.max_error(iso_lines)
+        return field
+
+    def max_error(self, iso_lines):
+        """
+        Largest deviation in % between the field and the ferrite percentage of
+        the iso-lines, at all vertices of the lines inside the grid.
+        """
+        error = 0.0
+        for level, line in iso_lines.items():
+            points = np.asarray(line, dtype=float).reshape(-1, 2)
+            inside = ((points[:, 0] >= self.cr_range[0]) & (points[:, 0] <= self.cr_range[1])
+                      & (points[:, 1] >= self.ni_range[0]) & (points[:, 1] <= self.ni_range[1]))
+            if inside.any():
+                error = max(error, float(np.abs(self.ferrite(points[inside]) - level).max()))
+        return error
+
+    def ferrite(self, points):
+        """
+        Ferrite percentage at an array of points of shape (n, 2) (or a single
+        point) by bilinear lookup. Points outside of the grid are moved to its
+        border.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        INSTRUMENTATION.count("ferrite lookups", len(points))
+        x = (np.clip(points[:, 0], *self.cr_range) - self.cr_range[0]) / self.cr_step
+        y = (np.clip(points[:, 1], *self.ni_range) - self.ni_range[0]) / self.ni_step
+        i = np.minimum(x.astype(np.intp), self.grid.shape[1] - 2)
+        j = np.minimum(y.astype(np.intp), self.grid.shape[0] - 2)
+        tx = x - i
+        ty = y - j
+        grid = self.grid
+        return ((grid[j, i] * (1 - tx) + grid[j, i + 1] * tx) * (1 - ty)
+                + (grid[j + 1, i] * (1 - tx) + grid[j + 1, i + 1] * tx) * ty)
+
+    def save(self, path):
+        """Stores the field in a .npz file, replaced in one step."""
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as file:
+                np.savez(file, grid=self.grid, cr_range=self.cr_range, ni_range=self.ni_range,
+                         error_bound=self.error_bound, key=self.key)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a field stored with save."""
+        with np.load(path) as data:
+            return cls(data["grid"], data["cr_range"], data["ni_range"],
+                       float(data["error_bound"]), str(data["key"]))
+
+    @classmethod
+    def cached(cls, path, iso_lines, resolution=0.1, cr_range=(0, 36), ni_range=(0, 28)):
+        """
+        Loads the field from path if it was built from the same lines and
+        grid, otherwise it is built and stored in path for the next run (if
+        path cannot be written, the field is only returned).
+        """
+        key = cls._key(iso_lines, resolution, cr_range, ni_range)
+        if os.path.exists(path):
+            try:
+                field = cls.load(path)
+            except (OSError, ValueError, KeyError):
+                field = None
+            if field is not None and field.key == key:
+                return field
+        field = cls.build(iso_lines, resolution, cr_range, ni_range)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            field.save(path)
+        except OSError:
+            pass
+        return field
+
+
+class AlloyDatabase:
+    """
+    A local SQLite store of metals. Every alloy is stored with its composition,
+    optional min/max ranges of its elements, and its Cr- and Ni-equivalent,
+    calculated once when it is added. An R-tree on the equivalents makes
+    queries like "all fillers with a Cr-equivalent of 18-26% and a
+    Ni-equivalent of 8-14%" fast on large catalogs. The results are
+    metal_dicts for weld_steels_filler / find_best_filler or an AlloyCatalog
+    for screen_pairs_fillers.
+
+    Parameters
+    ----------
+    path : TYPE string
+        DESCRIPTION. file of the database, ":memory:" for a temporary one
+
+    """
+
+    def __init__(self, path=":memory:"):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS alloys (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                cr_eq REAL NOT NULL,
+                ni_eq REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS compositions (
+                alloy_id INTEGER NOT NULL REFERENCES alloys(id) ON DELETE CASCADE,
+                element TEXT NOT NULL,
+                value REAL NOT NULL,
+                minimum REAL,
+                maximum REAL,
+                PRIMARY KEY (alloy_id, element));
+            CREATE INDEX IF NOT EXISTS alloys_kind ON alloys(kind);
+            """)
+        try:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS alloy_equivalents "
+                "USING rtree(id, cr_min, cr_max, ni_min, ni_max)")
+            self.rtree = True
+        except sqlite3.OperationalError:
+            # SQLite without the R*Tree module, a plain index is the next best
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS alloys_equivalents ON alloys(cr_eq, ni_eq)")
+            self.rtree = False
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM alloys").fetchone()[0]
+
+    def add_alloys(self, metal_dicts, kind="filler", ranges=None):
+        """
+        Adds metals to the database, a metal with the same name is replaced.
+
+        Parameters
+        ----------
+        metal_dicts : TYPE list
+            DESCRIPTION. metal_dicts with a "name". An element may also be
+                         given as a (min, max) tuple, the average is used as
+                         its value then
+        kind : TYPE string
+            DESCRIPTION. for example "base" or "filler"
+        ranges : TYPE dict
+            DESCRIPTION. optional, the name of a metal as key and a dict
+                         {element: (min, max)} as value
+
+        Returns
+        -------
+        None.
+
+        """
+        ranges = dict(ranges or {})
+        averages = []
+        for metal_dict in metal_dicts:
+            average = {}
+            metal_ranges = dict(ranges.get(metal_dict["name"], {}))
+            for element, value in metal_dict.items():
+                if element != "name" and isinstance(value, (tuple, list)):
+                    metal_ranges[element] = (value[0], value[1])
+                    value = (value[0] + value[1]) / 2
+                average[element] = value
+            ranges[metal_dict["name"]] = metal_ranges
+            averages.append(average)
+        catalog = AlloyCatalog.from_dicts(averages)
+        cr_values = cr_equivalent(catalog).tolist()
+        ni_values = ni_equivalent(catalog).tolist()
+
+        with self.connection:
+            self.remove(catalog.names, commit=False)
+            cursor = self.connection.cursor()
+            ids = {}
+            for name, cr, ni in zip(catalog.names, cr_values, ni_values):
+                cursor.execute("INSERT INTO alloys (name, kind, cr_eq, ni_eq) VALUES (?, ?, ?, ?)",
+                               (name, kind, cr, ni))
+                ids[name] = cursor.lastrowid
+            rows = []
+            for average in averages:
+                name = average["name"]
+                metal_ranges = ranges[name]
+                for element, value in average.items():
+                    if element == "name":
+                        continue
+                    minimum, maximum = metal_ranges.get(element, (None, None))
+                    rows.append((ids[name], element, value, minimum, maximum))
+            cursor.executemany("INSERT INTO compositions VALUES (?, ?, ?, ?, ?)", rows)
+            if self.rtree:
+                cursor.executemany("INSERT INTO alloy_equivalents VALUES (?, ?, ?, ?, ?)",
+                                   [(ids[name], cr, cr, ni, ni)
+                                    for name, cr, ni in zip(catalog.names, cr_values, ni_values)])
+
+    def remove(self, names, commit=True):
+        """Removes the metals names from the database."""
+        names = list(names)
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            marks = ", ".join("?" * len(chunk))
+            ids = "SELECT id FROM alloys WHERE name IN (%s)" % marks
+            self.connection.execute("DELETE FROM compositions WHERE alloy_id IN (%s)" % ids, chunk)
+            if self.rtree:
+                self.connection.execute("DELETE FROM alloy_equivalents WHERE id IN (%s)" % ids, chunk)
+            self.connection.execute("DELETE FROM alloys WHERE name IN (%s)" % marks, chunk)
+        if commit:
+            self.connection.commit()
+
+    def _select(self, cr_range, ni_range, kind):
+        """SQL and parameters selecting the ids of the matching metals."""
+        cr_low, cr_high = cr_range if cr_range is not None else (-math.inf, math.inf)
+        ni_low, ni_high = ni_range if ni_range is not None else (-math.inf, math.inf)
+        # the R-tree stores 32 bit floats, the exact check is done on alloys
+        sql = ("SELECT a.id FROM alloys a WHERE a.cr_eq BETWEEN ? AND ? "
+               "AND a.ni_eq BETWEEN ? AND ?")
+        parameters = [cr_low, cr_high, ni_low, ni_high]
+        if self.rtree and (cr_range is not None or ni_range is not None):
+            # CROSS JOIN keeps SQLite from scanning the kind index first
+            sql = ("SELECT a.id FROM alloy_equivalents r CROSS JOIN alloys a ON a.id = r.id "
+                   "WHERE r.cr_max >= ? AND r.cr_min <= ? AND r.ni_max >= ? AND r.ni_min <= ? "
+                   "AND a.cr_eq BETWEEN ? AND ? AND a.ni_eq BETWEEN ? AND ?")
+            parameters = [cr_low, cr_high, ni_low, ni_high] + parameters
+        if kind is not None:
+            sql += " AND a.kind = ?"
+            parameters.append(kind)
+        return sql, parameters
+
+    def query_equivalents(self, cr_range=None, ni_range=None, kind=None):
+        """
+        Returns (name, Cr-equivalent, Ni-equivalent) of all metals inside the
+        ranges, without loading their compositions.
+
+        Parameters
+        ----------
+        cr_range : TYPE tuple
+            DESCRIPTION. (lowest, highest) Cr-equivalent, None for any
+        ni_range : TYPE tuple
+            DESCRIPTION. (lowest, highest) Ni-equivalent, None for any
+        kind : TYPE string
+            DESCRIPTION. only metals of this kind, None for all
+
+        """
+        sql, parameters = self._select(cr_range, ni_range, kind)
+        return self.connection.execute(
+            "SELECT name, cr_eq, ni_eq FROM alloys WHERE id IN (%s) ORDER BY id" % sql,
+            parameters).fetchall()
+
+    def query(self, cr_range=None, ni_range=None, kind=None):
+        """
+        Same as query_equivalents, but returns the metal_dicts of the metals,
+        ready for weld_steels_filler and find_best_filler.
+        """
+        sql, parameters = self._select(cr_range, ni_range, kind)
+        rows = self.connection.execute(
+            "SELECT a.name, c.element, c.value FROM alloys a "
+            "JOIN compositions c ON c.alloy_id = a.id "
+            "WHERE a.id IN (%s) ORDER BY a.id" % sql, parameters)
+        metal_dicts = {}
+        for name, element, value in rows:
+            metal_dicts.setdefault(name, {"name": name})[element] = value
+        return list(metal_dicts.values())
+
+    def query_catalog(self, cr_range=None, ni_range=None, kind=None):
+        """Same as query, but returns an AlloyCatalog of the metals."""
+        return AlloyCatalog.from_dicts(self.query(cr_range, ni_range, kind))
+
+    def get(self, name):
+        """Returns the metal_dict of the metal name."""
+        metal_dict = {"name": name}
+        rows = self.connection.execute(
+            "SELECT c.element, c.value FROM compositions c JOIN alloys a ON c.alloy_id = a.id "
+            "WHERE a.name = ?", (name,)).fetchall()
+        if not rows and self.connection.execute(
+                "SELECT 1 FROM alloys WHERE name = ?", (name,)).fetchone() is None:
+            raise KeyError(name)
+        metal_dict.update(rows)
+        return metal_dict
+
+    def ranges(self, name):
+        """Returns {element: (min, max)} of the metal name, for elements with a range."""
+        rows = self.connection.execute(
+            "SELECT c.element, c.minimum, c.maximum FROM compositions c "
+            "JOIN alloys a ON c.alloy_id = a.id "
+            "WHERE a.name = ? AND c.minimum IS NOT NULL", (name,)).fetchall()
+        return {element: (minimum, maximum) for element, minimum, maximum in rows}
+
+    def names(self, kind=None):
+        """Returns the names of all metals, or of all metals of one kind."""
+        if kind is None:
+            rows = self.connection.execute("SELECT name FROM alloys ORDER BY id")
+        else:
+            rows = self.connection.execute("SELECT name FROM alloys WHERE kind = ? ORDER BY id", (kind,))
+        return [name for name, in rows]
+
+
+class ConstitutionDiagram:
+    """
+    A constitution diagram like the Schaeffler diagram: the formulas of its Cr-
+    and Ni-equivalents, its digitized iso-ferrite lines and other boundaries.
+    The built-in diagrams are registered at import with their curves as plain
+    point lists; the segment tables, indexes, bands and ferrite fields are
+    built once per diagram at their first use and then reused by every query.
+
+    Parameters
+    ----------
+    name : TYPE string
+        DESCRIPTION. name of the diagram, the key in the registry
+    cr_coefficients : TYPE dict
+        DESCRIPTION. element as key and its factor in the Cr-equivalent as
+                     value, for Schaeffler {"Cr": 1, "Mo": 1, "Si": 1.5, "Nb": 0.5}
+    ni_coefficients : TYPE dict
+        DESCRIPTION. element as key and its factor in the Ni-equivalent as value
+    iso_lines : TYPE dict
+        DESCRIPTION. ferrite content (% or FN) as key and its line (list of
+                     points) as value
+    boundaries : TYPE dict
+        DESCRIPTION. name of a boundary as key and its curve as value, for
+                     example the borders of the S-curve
+    cr_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Cr-equivalent of the diagram
+    ni_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Ni-equivalent of the diagram
+    ferrite_unit : TYPE string
+        DESCRIPTION. "%" for ferrite percent, "FN" for ferrite numbers
+    regions : TYPE dict
+        DESCRIPTION. optional, name of a phase region (for example "A+M") as
+                     key and the list of its polygons as value
+
+    """
+
+    def __init__(self, name, cr_coefficients, ni_coefficients, iso_lines, boundaries=None,
+                 cr_range=(0, 36), ni_range=(0, 28), ferrite_unit="%", regions=None):
+        self.name = name
+        self.cr_coefficients = dict(cr_coefficients)
+        self.ni_coefficients = dict(ni_coefficients)
+        self.iso_lines = dict(iso_lines)
+        self.boundaries = dict(boundaries or {})
+        self.cr_range = tuple(cr_range)
+        self.ni_range = tuple(ni_range)
+        self.ferrite_unit = ferrite_unit
+        self._segments = {}
+        self._indexes = {}
+        self.regions = dict(regions or {})
+        self._ferrite_fields = {}
+        self._region_index = None
+        self._bands = {}
+
+    def _equivalent(self, coefficients, metal_dict):
+        # the terms are added in the order of the formula, like Cr_equivalent
+        total = 0.0
+        for element, coefficient in coefficients.items():
+            try:
+                total = total + coefficient * get_value(metal_dict, element)
+            except KeyError:
+                pass
+        return total
+
+    def equivalents(self, metal_dict):
+        """Returns the point [Cr-equivalent, Ni-equivalent] of a metal_dict."""
+        return [self._equivalent(self.cr_coefficients, metal_dict),
+                self._equivalent(self.ni_coefficients, metal_dict)]
+
+    def equivalent_points(self, catalog):
+        """Returns the points of all alloys in an AlloyCatalog, shape (n, 2)."""
+        cr_values = np.zeros(len(catalog))
+        for element, coefficient in self.cr_coefficients.items():
+            cr_values = cr_values + coefficient * catalog.column(element)
+        ni_values = np.zeros(len(catalog))
+        for element, coefficient in self.ni_coefficients.items():
+            ni_values = ni_values + coefficient * catalog.column(element)
+        return np.column_stack((cr_values, ni_values))
+
+    def curve(self, key):
+        """
+        Returns a curve of the diagram: an iso-ferrite line for a number
+        (for example 10) or a boundary for its name (for example
+        "s_curve_left_border").
+        """
+        if isinstance(key, str):
+            return self.boundaries[key]
+        return self.iso_lines[key]
+
+    def segments(self, key):
+        """Returns the precomputed CurveSegments of the curve key."""
+        try:
+            return self._segments[key]
+        except KeyError:
+            segments = self._segments[key] = CurveSegments(self.curve(key))
+            return segments
+
+    def index(self, key):
+        """Returns the precomputed CurveIndex of the curve key."""
+        try:
+            return self._indexes[key]
+        except KeyError:
+            index = self._indexes[key] = CurveIndex(self.segments(key))
+            return index
+
+    def ferrite_field(self, resolution=0.1, cache_path=None):
+        """
+        Returns the FerriteField of the diagram's iso-lines, built once per
+        resolution. With cache_path the field is kept in a file between runs;
+        cache_path can be a file or a directory for a file named after the
+        diagram and the resolution.
+        """
+        try:
+            return self._ferrite_fields[resolution]
+        except KeyError:
+            if cache_path is None:
+                field = FerriteField.build(self.iso_lines, resolution, self.cr_range, self.ni_range)
+            else:
+                if os.path.isdir(cache_path):
+                    cache_path = os.path.join(cache_path, f"{self.name}_ferrite_{resolution:g}.npz")
+                field = FerriteField.cached(cache_path, self.iso_lines, resolution,
+                                            self.cr_range, self.ni_range)
+            self._ferrite_fields[resolution] = field
+            return field
+
+    def band(self, lower, upper):
+        """Returns the FerriteBand between the iso-lines lower and upper, built once."""
+        try:
+            return self._bands[lower, upper]
+        except KeyError:
+            band = self._bands[lower, upper] = FerriteBand(self.iso_lines[lower], self.iso_lines[upper])
+            return band
+
+    def region_index(self):
+        """Returns the RegionIndex of the diagram's phase regions, built once."""
+        if self._region_index is None:
+            if not self.regions:
+                raise ValueError(f"the {self.name} diagram has no phase regions")
+            self._region_index = RegionIndex(self.regions, self.cr_range, self.ni_range)
+        return self._region_index
+
+
+DIAGRAMS = {}
+
+
+def register_diagram(diagram):
+    """Adds a ConstitutionDiagram to the registry, under its name."""
+    DIAGRAMS[diagram.name] = diagram
+    return diagram
+
+
+def get_diagram(name="Schaeffler"):
+    """Returns a registered ConstitutionDiagram, a diagram is returned as is."""
+    if isinstance(name, ConstitutionDiagram):
+        return name
+    try:
+        return DIAGRAMS[name]
+    except KeyError:
+        raise KeyError(f"unknown diagram {name!r}, registered are {sorted(DIAGRAMS)}") from None
+
+
+def straight_line(start, end, points=43):
+    """Returns a straight line from start to end as a list of points."""
+    return [[start[0] + (end[0] - start[0]) * i / (points - 1),
+             start[1] + (end[1] - start[1]) * i / (points - 1)] for i in range(points)]
+
+
+def sample_composition(metal_dict, size, rng):
+    """
+    Draws random compositions of a metal within its tolerances.
+
+    Parameters
+    ----------
+    metal_dict : TYPE dict
+        DESCRIPTION. the composition, every element can be given as a number
+                     (fixed value), a tuple (min, max) (uniform distribution)
+                     or a dict {"mean": ..., "sd": ...} (normal distribution,
+                     negative values are set to 0); the name is ignored
+    size : TYPE int
+        DESCRIPTION. number of compositions
+    rng : TYPE numpy.random.Generator
+        DESCRIPTION. the random number generator
+
+    Returns
+    -------
+    samples : TYPE dict
+        DESCRIPTION. element as key and an array of shape (size,) as value
+
+    """
+    samples = {}
+    for element, value in metal_dict.items():
+        if element == "name":
+            continue
+        if isinstance(value, dict):
+            samples[element] = np.maximum(rng.normal(value["mean"], value["sd"], size), 0.0)
+        elif isinstance(value, (tuple, list)):
+            samples[element] = rng.uniform(value[0], value[1], size)
+        else:
+            samples[element] = np.full(size, float(value))
+    return samples
+
+
+def _sample_points(diagram, metal_dicts, size, rng):
+    # [Cr-equivalent, Ni-equivalent] of random compositions of several metals
+    # like sample_composition, shape (len(metal_dicts), size, 2); an element
+    # is drawn for all metals with the same kind of tolerance in one call
+    metals = np.arange(len(metal_dicts))
+    points = np.zeros((len(metal_dicts), size, 2))
+    for axis, coefficients in enumerate((diagram.cr_coefficients, diagram.ni_coefficients)):
+        for element, coefficient in coefficients.items():
+            values = [metal_dict.get(element, 0.0) for metal_dict in metal_dicts]
+            normal = np.array([isinstance(value, dict) for value in values])
+            uniform = np.array([isinstance(value, (tuple, list)) for value in values])
+            fixed = ~(normal | uniform)
+            samples = np.empty((len(metal_dicts), size))
+            if normal.any():
+                means = np.array([[values[k]["mean"]] for k in metals[normal]])
+                sds = np.array([[values[k]["sd"]] for k in metals[normal]])
+                samples[normal] = np.maximum(rng.normal(means, sds, (len(means), size)), 0.0)
+            if uniform.any():
+                lows = np.array([[values[k][0]] for k in metals[uniform]])
+                highs = np.array([[values[k][1]] for k in metals[uniform]])
+                samples[uniform] = rng.uniform(lows, highs, (len(lows), size))
+            samples[fixed] = np.array([float(values[k]) for k in metals[fixed]])[:, None]
+            points[:, :, axis] += coefficient * samples
+    return points
+
+
+def ferrite_window_probability(base_metal_dict1, base_metal_dict2, filler_dicts, dilution=(20, 40),
+                               ferrite_window=(5, 10), samples=1000000, seed=0, diagram="Schaeffler",
+                               ferrite_field=None, chunk_size=2**18):
+    """
+    Monte Carlo version of weld_steels_filler: the compositions of both base
+    metals and of the filler are drawn within their tolerances (see
+    sample_composition), the dilution is drawn within its range and the
+    ferrite of every resulting weld metal point is looked up, for all fillers
+    at once. The samples are drawn in blocks of 2**14, every block with its
+    own generator derived from seed, and processed in chunks of blocks, so
+    the memory does not grow with the number of samples and the result only
+    depends on seed, not on chunk_size.
+
+    Parameters
+    ----------
+    base_metal_dict1 : TYPE dict
+        DESCRIPTION. composition of base metal 1, with tolerances
+    base_metal_dict2 : TYPE dict
+        DESCRIPTION. composition of base metal 2, with tolerances
+    filler_dicts : TYPE list
+        DESCRIPTION. compositions of the fillers, with tolerances; with an
+                     AlloyDatabase {**db.get(name), **db.ranges(name)} is such
+                     a composition
+    dilution : TYPE tuple or float
+        DESCRIPTION. (min, max) of the dilution in % (uniform) or a fixed value
+    ferrite_window : TYPE tuple
+        DESCRIPTION. (lowest, highest) ferrite we accept
+    samples : TYPE int
+        DESCRIPTION. number of samples per filler
+    seed : TYPE int
+        DESCRIPTION. seed of the random number generator
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. the diagram (or its registered name) of the equivalents
+    ferrite_field : TYPE FerriteField
+        DESCRIPTION. optional, default is the ferrite field of the diagram
+    chunk_size : TYPE int
+        DESCRIPTION. number of samples per filler processed at once,
+                     rounded to whole blocks
+
+    Returns
+    -------
+    probabilities : TYPE dict
+        DESCRIPTION. name of the filler as key, probability of the weld metal
+                     to be inside ferrite_window as value
+
+    """
+    diagram = get_diagram(diagram)
+    if ferrite_field is None:
+        ferrite_field = diagram.ferrite_field()
+    block_size = 2**14
+    blocks = -(-samples // block_size)
+    block_seeds = np.random.SeedSequence(seed).spawn(blocks)
+    blocks_per_chunk = max(1, chunk_size // block_size)
+    inside = np.zeros(len(filler_dicts), dtype=np.int64)
+    for first_block in range(0, blocks, blocks_per_chunk):
+        chunk_points = []
+        for block in range(first_block, min(first_block + blocks_per_chunk, blocks)):
+            rng = np.random.default_rng(block_seeds[block])
+            size = min(block_size, samples - block * block_size)
+            points1, points2 = _sample_points(diagram, [base_metal_dict1, base_metal_dict2], size, rng)
+            mix50_points = mix_point_arrays(points1, points2, 50)
+            if isinstance(dilution, (tuple, list)):
+                dilutions = rng.uniform(dilution[0], dilution[1], size)
+            else:
+                dilutions = dilution
+            filler_points = _sample_points(diagram, filler_dicts, size, rng)
+            chunk_points.append(mix_point_arrays(mix50_points, filler_points, dilutions))
+        points = np.concatenate(chunk_points, axis=1)
+        ferrite = ferrite_field.ferrite(points.reshape(-1, 2)).reshape(points.shape[:2])
+        inside += np.count_nonzero((ferrite >= ferrite_window[0]) & (ferrite <= ferrite_window[1]), axis=1)
+    return {get_value(filler_dict, "name"): int(count) / samples
+            for filler_dict, count in zip(filler_dicts, inside)}
+
+
+def points_in_polygon(points, polygon, chunk_size=2**20):
+    """
+    Tests which points are inside a polygon (even-odd rule, by counting the
+    crossings of a ray in +Cr direction with the edges of the polygon).
+
+    Parameters
+    ----------
+    points : TYPE numpy array
+        DESCRIPTION. points of shape (n, 2) or a single point
+    polygon : TYPE list of lists
+        DESCRIPTION. the vertices of the polygon, it is closed automatically
+    chunk_size : TYPE int
+        DESCRIPTION. number of point/edge combinations processed at once
+
+    Returns
+    -------
+    inside : TYPE numpy array
+        DESCRIPTION. True for points inside, shape (n,)
+
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    starts = np.asarray(polygon, dtype=float)
+    ends = np.roll(starts, -1, axis=0)
+    slopes = np.zeros(len(starts))
+    horizontal = starts[:, 1] == ends[:, 1]
+    slopes[~horizontal] = ((ends[~horizontal, 0] - starts[~horizontal, 0])
+                           / (ends[~horizontal, 1] - starts[~horizontal, 1]))
+    inside = np.zeros(len(points), dtype=bool)
+    rows_per_chunk = max(1, chunk_size // max(len(starts), 1))
+    for first in range(0, len(points), rows_per_chunk):
+        x = points[first:first + rows_per_chunk, 0:1]
+        y = points[first:first + rows_per_chunk, 1:2]
+        crosses = (starts[:, 1] > y) != (ends[:, 1] > y)
+        x_crossing = starts[:, 0] + (y - starts[:, 1]) * slopes
+        inside[first:first + rows_per_chunk] = np.count_nonzero(crosses & (x < x_crossing), axis=1) % 2 == 1
+    return inside
+
+
+def _trace_mask(mask):
+    # boundaries of the True cells of a mask as closed loops of cell corners
+    # (i, j), every filled cell contributes its counterclockwise edges towards
+    # empty neighbours, the edges are then chained into loops
+    padded = np.pad(mask, 1)
+    filled = padded[1:-1, 1:-1]
+    edges = []
+    for neighbour, offsets in ((padded[:-2, 1:-1], ((0, 0), (1, 0))),     # below
+                               (padded[1:-1, 2:], ((1, 0), (1, 1))),      # right
+                               (padded[2:, 1:-1], ((1, 1), (0, 1))),      # above
+                               (padded[1:-1, :-2], ((0, 1), (0, 0)))):    # left
+        j, i = np.nonzero(filled & ~neighbour)
+        (di0, dj0), (di1, dj1) = offsets
+        edges.extend(zip(zip((i + di0).tolist(), (j + dj0).tolist()),
+                         zip((i + di1).tolist(), (j + dj1).tolist())))
+    following = {}
+    for start, end in edges:
+        following.setdefault(start, []).append(end)
+    loops = []
+    while following:
+        start = next(iter(following))
+        loop = [start]
+        vertex = start
+        while True:
+            ends = following[vertex]
+            end = ends.pop()
+            if not ends:
+                del following[vertex]
+            if end == start:
+                break
+            loop.append(end)
+            vertex = end
+        # only the corners of the staircase are kept
+        corners = [loop[k] for k in range(len(loop))
+                   if (loop[k][0] - loop[k - 1][0], loop[k][1] - loop[k - 1][1])
+                   != (loop[(k + 1) % len(loop)][0] - loop[k][0], loop[(k + 1) % len(loop)][1] - loop[k][1])]
+        loops.append(corners)
+    return loops
+
+
+class FerriteBand:
+    """
+    The region between two iso-ferrite lines, for example
+    ferrite_5_percent_line and ferrite_10_percent_line, as a polygon (the
+    lower line and the upper line backwards). The bounding boxes of the
+    polygon and of its edges are calculated once; the weld metal of a filler
+    moves on a straight path when the dilution changes, these paths are
+    pruned with the bounding boxes and only the remaining ones are clipped
+    exactly with the edges of the polygon.
+
+    Parameters
+    ----------
+    lower_line : TYPE list of lists
+        DESCRIPTION. the iso-line with less ferrite
+    upper_line : TYPE list of lists
+        DESCRIPTION. the iso-line with more ferrite
+
+    """
+
+    def __init__(self, lower_line, upper_line):
+        self.polygon = np.vstack((np.asarray(lower_line, dtype=float),
+                                  np.asarray(upper_line, dtype=float)[::-1]))
+        self.bbox = np.concatenate((self.polygon.min(axis=0), self.polygon.max(axis=0)))
+        self.edge_starts = self.polygon
+        self.edge_ends = np.roll(self.polygon, -1, axis=0)
+        self.edge_bboxes = np.hstack((np.minimum(self.edge_starts, self.edge_ends),
+                                      np.maximum(self.edge_starts, self.edge_ends)))
+
+    def contains(self, points):
+        """True for points inside the band, points of shape (n, 2)."""
+        return points_in_polygon(points, self.polygon)
+
+    def path_intervals(self, starts, ends):
+        """
+        Clips straight paths with the band.
+
+        Parameters
+        ----------
+        starts : TYPE array-like
+            DESCRIPTION. start points of the paths, shape (n, 2)
+        ends : TYPE array-like
+            DESCRIPTION. end points of the paths, shape (n, 2)
+
+        Returns
+        -------
+        intervals : TYPE numpy array
+            DESCRIPTION. (t_in, t_out) of the longest part of every path
+                         inside the band, 0 is the start and 1 the end of a
+                         path, NaN for paths that miss the band, shape (n, 2)
+
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        intervals = np.full((len(starts), 2), np.nan)
+        path_low = np.minimum(starts, ends)
+        path_high = np.maximum(starts, ends)
+        # paths outside of the bounding box of the band never enter it
+        candidates = np.flatnonzero(np.all(path_high >= self.bbox[:2], axis=1)
+                                    & np.all(path_low <= self.bbox[2:], axis=1))
+        INSTRUMENTATION.count("band candidates", len(candidates))
+        if len(candidates) == 0:
+            return intervals
+        # only the path/edge combinations with overlapping boxes are intersected
+        overlap = (np.all(path_high[candidates, None, :] >= self.edge_bboxes[None, :, :2], axis=2)
+                   & np.all(path_low[candidates, None, :] <= self.edge_bboxes[None, :, 2:], axis=2))
+        rows, edges = np.nonzero(overlap)
+        INSTRUMENTATION.count("band clippings", len(rows))
+        path_start = starts[candidates[rows]]
+        path_direction = ends[candidates[rows]] - path_start
+        edge_start = self.edge_starts[edges]
+        edge_direction = self.edge_ends[edges] - edge_start
+        denominator = path_direction[:, 0] * edge_direction[:, 1] - path_direction[:, 1] * edge_direction[:, 0]
+        relative = edge_start - path_start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (relative[:, 0] * edge_direction[:, 1] - relative[:, 1] * edge_direction[:, 0]) / denominator
+            u = (relative[:, 0] * path_direction[:, 1] - relative[:, 1] * path_direction[:, 0]) / denominator
+        # an edge owns its start but not its end, so a crossing through a
+        # vertex of the polygon counts once
+        crossing = (denominator != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u < 1)
+        crossings = np.full(overlap.shape, np.nan)
+        crossings[rows[crossing], edges[crossing]] = t[crossing]
+        crossings.sort(axis=1)
+        # the path is cut into pieces at its crossings, inside and outside
+        # alternate, starting with the side of the start point
+        cuts = np.column_stack((np.zeros(len(candidates)), crossings, np.ones(len(candidates))))
+        cuts = np.where(np.isnan(cuts), 1.0, cuts)
+        inside_at_start = self.contains(starts[candidates])
+        piece = np.arange(cuts.shape[1] - 1)
+        inside = inside_at_start[:, None] ^ (piece[None, :] % 2 == 1)
+        lengths = np.where(inside, np.diff(cuts, axis=1), -1.0)
+        best = np.argmax(lengths, axis=1)
+        found = lengths[np.arange(len(candidates)), best] > 0
+        rows = np.arange(len(candidates))[found]
+        intervals[candidates[found], 0] = cuts[rows, best[found]]
+        intervals[candidates[found], 1] = cuts[rows, best[found] + 1]
+        return intervals
+
+
+def ferrite_band_fillers(base_metal_dict1, base_metal_dict2, filler_catalog, lower=5, upper=10,
+                         dilution_range=(20, 40), diagram="Schaeffler"):
+    """
+    Finds every filler whose weld metal lies between two iso-ferrite lines
+    over a dilution range, and the dilutions for which it does. The weld
+    metal of a filler moves on the line from the filler to the 50% point of
+    the steels (see weld_steels_filler), between the two dilutions of
+    dilution_range it is a straight path, which FerriteBand clips.
+
+    Parameters
+    ----------
+    base_metal_dict1 : TYPE dict
+        DESCRIPTION. composition of base metal 1
+    base_metal_dict2 : TYPE dict
+        DESCRIPTION. composition of base metal 2
+    filler_catalog : TYPE AlloyCatalog
+        DESCRIPTION. the candidate fillers
+    lower : TYPE float
+        DESCRIPTION. the lower iso-line of the diagram, for example 5
+    upper : TYPE float
+        DESCRIPTION. the upper iso-line of the diagram, for example 10
+    dilution_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) dilution in %
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. the diagram (or its registered name)
+
+    Returns
+    -------
+    TYPE dict
+        DESCRIPTION. filler name as key and (lowest, highest) dilution in %
+                     with the weld metal inside the band as value, for the
+                     fillers that reach the band; a filler inside for the
+                     whole range has the value dilution_range
+
+    """
+    diagram = get_diagram(diagram)
+    band = diagram.band(lower, upper)
+    point1 = np.array(diagram.equivalents(base_metal_dict1))
+    point2 = np.array(diagram.equivalents(base_metal_dict2))
+    mix50_point = mix_points(point1, point2, 50)
+    filler_points = diagram.equivalent_points(filler_catalog)
+    starts = mix_point_arrays(mix50_point, filler_points, dilution_range[0])
+    ends = mix_point_arrays(mix50_point, filler_points, dilution_range[1])
+    intervals = band.path_intervals(starts, ends)
+    dilutions = dilution_range[0] + intervals * (dilution_range[1] - dilution_range[0])
+    return {name: (float(low), float(high))
+            for name, (low, high) in zip(filler_catalog.names, dilutions) if not np.isnan(low)}
+
+
+class FillerRegion:
+    """
+    The feasible region of filler points (Cr-equivalent, Ni-equivalent) of a
+    base-metal pair, built by feasible_filler_region. The region is given as
+    a mask on a grid of filler points and as polygons along the borders of
+    the grid cells (outer borders counterclockwise, holes clockwise).
+
+    Attributes
+    ----------
+    mask : TYPE numpy array
+        DESCRIPTION. True for feasible grid cells, shape (ni cells, cr cells)
+    cr_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Cr-equivalent of the grid
+    ni_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Ni-equivalent of the grid
+    polygons : TYPE list
+        DESCRIPTION. the borders of the region, lists of points
+
+    """
+
+    def __init__(self, mask, cr_range, ni_range, polygons):
+        self.mask = mask
+        self.cr_range = tuple(cr_range)
+        self.ni_range = tuple(ni_range)
+        self.polygons = polygons
+
+    def contains(self, points):
+        """
+        Tests which filler points are inside the region, points of shape (n, 2)
+        or a single point, for example equivalent_points(filler_catalog).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        inside = np.zeros(len(points), dtype=bool)
+        # borders of holes are polygons of their own, the even-odd rule
+        # over all polygons gives the region
+        for polygon in self.polygons:
+            inside ^= points_in_polygon(points, polygon)
+        return inside
+
+
+def feasible_filler_region(base_metal_dict1, base_metal_dict2, dilution_range=(20, 40), ferrite_window=(5, 10),
+                           dilution_steps=9, resolution=0.1, cr_range=(0, 36), ni_range=(0, 28),
+                           diagram="Schaeffler", ferrite_field=None, danger_zone=None):
+    """
+    The inverse of find_best_filler: finds all filler points for which the
+    weld metal of the two base metals stays inside ferrite_window and outside
+    of the danger zone for every dilution of dilution_range. The filler
+    points are a grid over the diagram, the weld metal of every grid point
+    is calculated like weld_steels_filler does (with mix_points) for
+    dilution_steps dilutions, all at once.
+
+    Parameters
+    ----------
+    base_metal_dict1 : TYPE dict
+        DESCRIPTION. composition of base metal 1
+    base_metal_dict2 : TYPE dict
+        DESCRIPTION. composition of base metal 2
+    dilution_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) dilution in %
+    ferrite_window : TYPE tuple
+        DESCRIPTION. (lowest, highest) ferrite we accept
+    dilution_steps : TYPE int
+        DESCRIPTION. number of dilutions checked within dilution_range
+    resolution : TYPE float
+        DESCRIPTION. size of the grid cells in Cr- and Ni-equivalent
+    cr_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Cr-equivalent of the filler grid
+    ni_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Ni-equivalent of the filler grid
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. the diagram (or its registered name) of the equivalents
+    ferrite_field : TYPE FerriteField
+        DESCRIPTION. optional, default is the ferrite field of the diagram
+    danger_zone : TYPE list of lists
+        DESCRIPTION. polygon the weld metal must not enter, default are the
+                     diagram's regions with martensite (M, A+M, M+F, A+M+F),
+                     the same ones RegionIndex.contains_phase finds
+
+    Returns
+    -------
+    TYPE FillerRegion
+        DESCRIPTION. the feasible filler points as mask and polygons
+
+    """
+    diagram = get_diagram(diagram)
+    if ferrite_field is None:
+        ferrite_field = diagram.ferrite_field()
+    point1 = np.array(diagram.equivalents(base_metal_dict1))
+    point2 = np.array(diagram.equivalents(base_metal_dict2))
+    mix50_point = mix_points(point1, point2, 50)
+    columns = int(round((cr_range[1] - cr_range[0]) / resolution))
+    rows = int(round((ni_range[1] - ni_range[0]) / resolution))
+    cr_step = (cr_range[1] - cr_range[0]) / columns
+    ni_step = (ni_range[1] - ni_range[0]) / rows
+    cr_values = cr_range[0] + (np.arange(columns) + 0.5) * cr_step
+    ni_values = ni_range[0] + (np.arange(rows) + 0.5) * ni_step
+    filler_points = np.stack(np.meshgrid(cr_values, ni_values), axis=-1).reshape(-1, 1, 2)
+    dilutions = np.linspace(dilution_range[0], dilution_range[1], dilution_steps)
+    points = mix_point_arrays(mix50_point, filler_points, dilutions).reshape(-1, 2)
+    ferrite = ferrite_field.ferrite(points)
+    feasible = (ferrite >= ferrite_window[0]) & (ferrite <= ferrite_window[1])
+    if danger_zone is not None:
+        feasible[feasible] = ~points_in_polygon(points[feasible], danger_zone)
+    elif diagram.regions:
+        feasible[feasible] = ~diagram.region_index().contains_phase(points[feasible], "M")
+    mask = feasible.reshape(rows, columns, dilution_steps).all(axis=2)
+    polygons = [[[cr_range[0] + i * cr_step, ni_range[0] + j * ni_step] for i, j in loop]
+                for loop in _trace_mask(mask)]
+    return FillerRegion(mask, cr_range, ni_range, polygons)
+
+
+class RegionIndex:
+    """
+    Finds the phase region (A, M, F, A+M, A+F, M+F, A+M+F) of many points at
+    once. The regions are polygons that tile the diagram. A grid over the
+    diagram is labelled once: cells that no border passes through get the
+    label of their region, so most points are classified by a single lookup.
+    Only points in cells with a border are tested against the polygons whose
+    bounding box contains them.
+
+    Parameters
+    ----------
+    regions : TYPE dict
+        DESCRIPTION. name of the region as key and the list of its polygons
+                     as value
+    cr_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Cr-equivalent of the grid
+    ni_range : TYPE tuple
+        DESCRIPTION. (lowest, highest) Ni-equivalent of the grid
+    resolution : TYPE float
+        DESCRIPTION. size of the grid cells
+
+    """
+
+    def __init__(self, regions, cr_range=(0, 36), ni_range=(0, 28), resolution=0.1):
+        self.names = list(regions)
+        self.polygons = []
+        self.polygon_codes = []
+        for code, polygons in enumerate(regions.values()):
+            for polygon in polygons:
+                self.polygons.append(np.asarray(polygon, dtype=float))
+                self.polygon_codes.append(code)
+        self.bboxes = np.array([[polygon[:, 0].min(), polygon[:, 1].min(),
+                                 polygon[:, 0].max(), polygon[:, 1].max()] for polygon in self.polygons])
+        self.cr_range = tuple(cr_range)
+        self.ni_range = tuple(ni_range)
+        columns = int(np.ceil((cr_range[1] - cr_range[0]) / resolution))
+        rows = int(np.ceil((ni_range[1] - ni_range[0]) / resolution))
+        self.resolution = resolution
+        # cells a border passes through (and their neighbours) keep -2, their
+        # points are resolved exactly; the borders are sampled every half cell
+        border = np.zeros((rows + 2, columns + 2), dtype=bool)
+        for polygon in self.polygons:
+            for start, end in zip(polygon, np.roll(polygon, -1, axis=0)):
+                steps = int(np.ceil(np.hypot(*(end - start)) / (resolution / 2))) + 1
+                samples = start + (end - start) * np.linspace(0, 1, steps)[:, None]
+                i = np.clip(np.floor((samples[:, 0] - cr_range[0]) / resolution).astype(np.intp), -1, columns)
+                j = np.clip(np.floor((samples[:, 1] - ni_range[0]) / resolution).astype(np.intp), -1, rows)
+                border[j + 1, i + 1] = True
+        border = (border[1:-1, 1:-1] | border[:-2, 1:-1] | border[2:, 1:-1] | border[1:-1, :-2]
+                  | border[1:-1, 2:] | border[:-2, :-2] | border[:-2, 2:] | border[2:, :-2] | border[2:, 2:])
+        cr_values = cr_range[0] + (np.arange(columns) + 0.5) * resolution
+        ni_values = ni_range[0] + (np.arange(rows) + 0.5) * resolution
+        centers = np.stack(np.meshgrid(cr_values, ni_values), axis=-1).reshape(-1, 2)
+        self.grid = self._exact(centers).reshape(rows, columns)
+        self.grid[border] = -2
+
+    def _exact(self, points):
+        # region of every point by point-in-polygon tests, -1 outside of all
+        codes = np.full(len(points), -1, dtype=np.intp)
+        for code, polygon, bbox in zip(self.polygon_codes, self.polygons, self.bboxes):
+            candidates = np.nonzero((codes == -1)
+                                    & (points[:, 0] >= bbox[0]) & (points[:, 0] <= bbox[2])
+                                    & (points[:, 1] >= bbox[1]) & (points[:, 1] <= bbox[3]))[0]
+            if len(candidates):
+                codes[candidates[points_in_polygon(points[candidates], polygon)]] = code
+        return codes
+
+    def codes(self, points):
+        """
+        Index of the region (in names) of every point of an array of shape
+        (n, 2), -1 for points outside of all regions.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        i = np.floor((points[:, 0] - self.cr_range[0]) / self.resolution).astype(np.intp)
+        j = np.floor((points[:, 1] - self.ni_range[0]) / self.resolution).astype(np.intp)
+        on_grid = (i >= 0) & (i < self.grid.shape[1]) & (j >= 0) & (j < self.grid.shape[0])
+        codes = np.full(len(points), -2, dtype=np.intp)
+        codes[on_grid] = self.grid[j[on_grid], i[on_grid]]
+        unresolved = np.nonzero(codes == -2)[0]
+        INSTRUMENTATION.count("region lookups", len(points))
+        INSTRUMENTATION.count("exact region tests", len(unresolved))
+        codes[unresolved] = self._exact(points[unresolved])
+        return codes
+
+    def classify(self, points):
+        """
+        Name of the region of every point of an array of shape (n, 2) (or a
+        single point), "" for points outside of all regions.
+        """
+        names = np.asarray(self.names + [""], dtype=object)
+        return names[self.codes(points)]
+
+    def contains_phase(self, points, phase="M"):
+        """True for every point in a region with the phase, for example "M"."""
+        has_phase = np.array([phase in name.split("+") for name in self.names] + [False])
+        return has_phase[self.codes(points)]
 
-# first we show the background, then we add points etc.
-plot_background(0.5)
-
-# we add some points
-plot_metal_dict(steel_14021_avg_dict, get_value(steel_14021_avg_dict, "name"))
-plot_metal_dict(steel_14723_avg_dict, get_value(steel_14723_avg_dict, "name"))
-plot_metal_dict(bohler_Thermanit2509CuT_avg_dict, get_value(bohler_Thermanit2509CuT_avg_dict, "name"))
-plot_metal_dict(bohler_ThermanitJE308LSi_dict, get_value(bohler_ThermanitJE308LSi_dict, "name"))
-plot_metal_dict(bohler_FOXCN2312MoA_dict, get_value(bohler_FOXCN2312MoA_dict, "name"))
-plot_metal_dict(bohler_EMK8_dict, get_value(bohler_EMK8_dict, "name"))
-plot_metal_dict(bohler_UnionIMoMn_dict, get_value(bohler_UnionIMoMn_dict, "name"))
-#plot_metal_dict(bohler_UnionICrMo910_dict, get_value(bohler_UnionICrMo910_dict, "name"))
-plot_metal_dict(bohler_Thermanit1605Mo_dict, get_value(bohler_Thermanit1605Mo_dict, "name"))
-plot_metal_dict(bohler_CAT430LCbIG_dict, get_value(bohler_CAT430LCbIG_dict, "name"))
-plot_metal_dict(bohler_ThermanitGE316LCryo_dict, get_value(bohler_ThermanitGE316LCryo_dict, "name"))
-# plot_metal_dict(steel_A508_avg_dict, get_value(steel_A508_avg_dict, "name"))
-# plot_metal_dict(steel_A304L_avg_dict, get_value(steel_A304L_avg_dict, "name"))
-# plot_metal_dict(filler_308L_dict, get_value(filler_308L_dict, "name"))
-
-
-# we plot a line between our two metals we want to weld
-plot_line_dicts(steel_14021_avg_dict, steel_14723_avg_dict, "r-")
-# plot_line_dicts(steel_A508_avg_dict, steel_A304L_avg_dict, "r-")
-
-# we zoom into an interesting area of the diagram
-# maxima are Cr:0-36 and Ni= 0-28
-Cr_lower_lim = 0
-Cr_upper_lim = 36
-Ni_lower_lim = 0
-Ni_upper_lim = 28
-x_canvas = 100
-y_canvas = 150
-x_lower = x_transform2(Cr_lower_lim) - x_canvas
-x_upper = x_transform2(Cr_upper_lim)
-y_lower = y_transform2(Ni_lower_lim)+ y_canvas
-y_upper = y_transform2(Ni_upper_lim)
-plt.xlim([x_lower,x_upper])
-plt.ylim([y_lower,y_upper])
-
-
-# we want to store results in a list of lists
-results_points_dict = {}
-
-# let's try the first filler
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_Thermanit2509CuT_avg_dict)
-results_points_dict[get_value(bohler_Thermanit2509CuT_avg_dict, "name")] = result
-
-# let's try another filler bohler_ThermanitJE308LSi
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_ThermanitJE308LSi_dict)
-results_points_dict[get_value(bohler_ThermanitJE308LSi_dict, "name")] = result
-
-# let's try another filler bohler_UnionIMoMn
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_UnionIMoMn_dict)
-results_points_dict[get_value(bohler_UnionIMoMn_dict, "name")] = result
-
-# let's try another filler bohler_EMK8
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_EMK8_dict)
-results_points_dict[get_value(bohler_EMK8_dict, "name")] = result
-
-# let's try another filler bohler_Thermanit1605Mo
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_Thermanit1605Mo_dict)
-results_points_dict[get_value(bohler_Thermanit1605Mo_dict, "name")] = result
-
-# let's try another filler bohler_CAT430LCbIG
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_CAT430LCbIG_dict)
-results_points_dict[get_value(bohler_CAT430LCbIG_dict, "name")] = result
-
-# let's try another filler bohler_ThermanitGE316LCryo
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_ThermanitGE316LCryo_dict)
-results_points_dict[get_value(bohler_ThermanitGE316LCryo_dict, "name")] = result
-
-# one last try
-result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_FOXCN2312MoA_dict)
-results_points_dict[get_value(bohler_FOXCN2312MoA_dict, "name")] = result
-
-
-
-# # first pass
-# result1 = weld_steels_filler(steel_A304L_avg_dict, steel_A508_avg_dict, filler_308L_dict) # mind the order!!!
-# results_points_dict[get_value(filler_308L_dict, "name")] = result1
-# # second pass
-# result2 = weld_steels_filler(steel_A304L_avg_dict, steel_A304L_avg_dict, filler_308L_dict) # mind the order!!!
-# results_points_dict[get_value(filler_308L_dict, "name")] = result2
-# # third pass
-# result3 = weld_steels_filler(steel_A508_avg_dict, steel_A508_avg_dict, filler_308L_dict) # mind the order!!!
-# results_points_dict[get_value(filler_308L_dict, "name")] = result3
-# # fourth pass
-# result3 = weld_steels_filler(steel_A304L_avg_dict, steel_A508_avg_dict, filler_308L_dict) # mind the order!!!
-# results_points_dict[get_value(filler_308L_dict, "name")] = result3
 
+def plot_curve_points_list(points_list, style):
+    """
+    Plots a curve from a points_list. Segments are just straight lines, the
+    whole curve is drawn as one polyline.
 
+    Parameters
+    ----------
+    points_list : TYPE list
+        DESCRIPTION. List of coordinates in the S-diagram
+    style : TYPE string
+        DESCRIPTION. the usual matplotlib-strings for styles like "ro" for red
+                     circles
+
+    Returns
+    -------
+    None.
+
+    """
+    plt = _pyplot()
+    if len(points_list) < 2:
+        return
+    x_coords, y_coords = transform_points2(points_list)
+    plt.plot(x_coords, y_coords, style, markersize=6)
+    INSTRUMENTATION.count("artists created")
+
+
+def _next_colors(number):
+    plt = _pyplot()
+    # the colors of the color cycle, continued after the points already
+    # scattered on the axes, like single scatter calls would get them
+    colors = plt.rcParams["axes.prop_cycle"].by_key().get("color", ["C0"])
+    first = sum(len(collection.get_offsets()) for collection in plt.gca().collections)
+    return [colors[(first + i) % len(colors)] for i in range(number)]
+
+
+def plot_metal_points(metal_points, texts=None, marker="^", s=250):
+    """
+    Plots a group of points in the Schaeffler diagram as one scatter, every
+    point in its own color like single plot_metal_point calls.
+
+    Parameters
+    ----------
+    metal_points : TYPE list
+        DESCRIPTION. points, x is chromium equivalent and second is Ni-equivalent
+    texts : TYPE list
+        DESCRIPTION. optional, one text per point, written next to the point
+    marker : TYPE string
+        DESCRIPTION. matplotlib marker of the points
+    s : TYPE float
+        DESCRIPTION. size of the markers
+
+    Returns
+    -------
+    None.
+
+    """
+    plt = _pyplot()
+    x_coords, y_coords = transform_points2(metal_points)
+    if len(x_coords) == 0:
+        return
+    plt.scatter(x_coords, y_coords, marker=marker, s=s, c=_next_colors(len(x_coords)))
+    INSTRUMENTATION.count("artists created", 1 + len(texts or []))
+    for x_coord, y_coord, text in zip(x_coords, y_coords, texts or []):
+        plt.text(x_coord+10, y_coord, text)
+
+
+def plot_metal_dicts(metal_dicts, texts=None):
+    """
+    Plots a group of metal_dicts in the Schaeffler diagram as one scatter,
+    like single plot_metal_dict calls.
+
+    Parameters
+    ----------
+    metal_dicts : TYPE list
+        DESCRIPTION. the metal_dicts we want to show
+    texts : TYPE list
+        DESCRIPTION. optional, one text per metal, the names if omitted
+
+    Returns
+    -------
+    None.
+
+    """
+    catalog = AlloyCatalog.from_dicts(metal_dicts)
+    if texts is None:
+        texts = catalog.names
+    plot_metal_points(equivalent_points(catalog), texts, marker="o", s=200)
+
+
+######################### THE DIAGRAMS ########################################
+# the curves of the Schaeffler diagram, digitized from Schaeffler_cut2.jpg
 # we want to find an average curve in the center of the "S"
 # one point for every 0.5% of Ni-equivalent
 s_curve_center = [[13.2,0],[14.3,0.5],[15.4,1],[16.6,1.5],[17.9,2],[19.2,2.5],
@@ -687,7 +3561,6 @@ s_curve_center = [[13.2,0],[14.3,0.5],[15.4,1],[16.6,1.5],[17.9,2],[19.2,2.5],
                 [22.25,7.5],[21.75,8],[21.3,8.5],[20.9,9],[20.6,9.5],[20.4,10],
                 [20.35,10.5],[20.3,11],[20.3,11.5],[20.3,12],[20.3,12.5],
                 [20.3,13]]
-plot_curve_points_list(s_curve_center, "rX-")
 
 s_curve_left_border = [[11.9,0],[12.9,0.5],[13.95,1],[15.0,1.5],[16.05,2],[17.2,2.5],
                 [18.2,3],[19.3,3.5],[20.2,4],[21.05,4.5],[21.5,4.75],[21.9,5],
@@ -696,7 +3569,6 @@ s_curve_left_border = [[11.9,0],[12.9,0.5],[13.95,1],[15.0,1.5],[16.05,2],[17.2,
                 [19.0,9.5],[18.4,10],[17.85,10.4],[18.4,11],[18.9,11.5],
                 [19.35,12.0],[19.85,12.5],[20.3,13.0],[20.8,13.5],[21.25,14.0],
                 [21.75,14.5],[22.2,15.0],[22.7,15.5],[23.3,16.1]]
-plot_curve_points_list(s_curve_left_border, "bX-")
 
 s_curve_right_border = [[14.7,0],[16.0,0.5],[17.4,1],[18.6,1.5],[20.0,2],[21.35,2.5],
                 [22.6,3],[23.95,3.5],[25.25,4],[26.85,4.6],[26.7,4.75],[26.35,5],
@@ -705,7 +3577,6 @@ s_curve_right_border = [[14.7,0],[16.0,0.5],[17.4,1],[18.6,1.5],[20.0,2],[21.35,
                 [21.85,10.4],[21.96,11],[22.05,11.5],[22.18,12.0],[22.32,12.5],
                 [22.45,13.0],[22.6,13.5],[22.75,14.0],[22.9,14.5],[23.05,15.0],
                 [23.2,15.5],[23.3,16.1]]
-plot_curve_points_list(s_curve_right_border, "cX-")
 
 # let's create the ferrite 0% line, as it is a straight line this is easier:
 ferrite_0_percent_line = []
@@ -713,7 +3584,6 @@ for i in range (43):
     x_ferrite0 = 14.4 + i * 0.5
     y_ferrite0 = 8.25 + i * 0.523
     ferrite_0_percent_line.append([x_ferrite0, y_ferrite0])
-plot_curve_points_list(ferrite_0_percent_line, "b-")
 
 # let's create the ferrite 5% line:
 ferrite_5_percent_line = []
@@ -721,7 +3591,6 @@ for i in range (43):
     x_ferrite5 = 15.1 + i * 0.5
     y_ferrite5 = 7.7 + i * 0.488
     ferrite_5_percent_line.append([x_ferrite5, y_ferrite5])
-plot_curve_points_list(ferrite_5_percent_line, "r-")
 
 # let's create the ferrite 10% line:
 ferrite_10_percent_line = []
@@ -729,7 +3598,6 @@ for i in range (43):
     x_ferrite10 = 15.85 + i * 0.5
     y_ferrite10 = 7.1 + i * 0.433
     ferrite_10_percent_line.append([x_ferrite10, y_ferrite10])
-plot_curve_points_list(ferrite_10_percent_line, "g-")
 
 # let's create the ferrite 20% line:
 ferrite_20_percent_line = []
@@ -737,7 +3605,6 @@ for i in range (43):
     x_ferrite20 = 16.85 + i * 0.5
     y_ferrite20 = 6.3 + i * 0.362
     ferrite_20_percent_line.append([x_ferrite20, y_ferrite20])
-plot_curve_points_list(ferrite_20_percent_line, "c-")
 
 # let's create the ferrite 40% line:
 ferrite_40_percent_line = []
@@ -745,7 +3612,6 @@ for i in range (38):
     x_ferrite40 = 17.9 + i * 0.5
     y_ferrite40 = 5.5 + i * 0.322
     ferrite_40_percent_line.append([x_ferrite40, y_ferrite40])
-plot_curve_points_list(ferrite_40_percent_line, "y-")
 
 # let's create the ferrite 7.5% line from the 5% and 10% line:
 ferrite_075_percent_line = []
@@ -753,7 +3619,6 @@ for i in range (43):
     x_ferrite075 =  15.5 + i * 0.5
     y_ferrite075 = (ferrite_5_percent_line[i][1] + ferrite_10_percent_line[i][1])/2
     ferrite_075_percent_line.append([x_ferrite075, y_ferrite075])
-plot_curve_points_list(ferrite_075_percent_line, "k--")
 
 # let's create the ferrite 2.5% line from the 0% and 5% line:
 ferrite_025_percent_line = []
@@ -761,7 +3626,6 @@ for i in range (43):
     x_ferrite025 =  14.8 + i * 0.5
     y_ferrite025 = (ferrite_0_percent_line[i][1] + ferrite_5_percent_line[i][1])/2 - 0.02
     ferrite_025_percent_line.append([x_ferrite025, y_ferrite025])
-plot_curve_points_list(ferrite_025_percent_line, "k--")
 
 # let's create the ferrite 15.0% line from the 10% and 20% line:
 ferrite_15_percent_line = []
@@ -769,49 +3633,255 @@ for i in range (43):
     x_ferrite15 =  16.35 + i * 0.5
     y_ferrite15 = (ferrite_10_percent_line[i][1] + ferrite_20_percent_line[i][1])/2 - 0.0
     ferrite_15_percent_line.append([x_ferrite15, y_ferrite15])
-plot_curve_points_list(ferrite_15_percent_line, "k--")
-
-
-# let's find the best filler in our ensemble of fillers for the two steels
-dilution = 25
-ferrite = 10
-line = ferrite_10_percent_line
-best_filler, result = find_best_filler(results_points_dict, line, dilution)
-plot_line_points(result[0], result[1], "kD-", 15)
-print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
-
-dilution = 30
-ferrite = 10
-line = ferrite_10_percent_line
-best_filler, result = find_best_filler(results_points_dict, line, dilution)
-plot_line_points(result[0], result[1], "kD-", 15)
-print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
-
-dilution = 25
-ferrite = 7.5
-line = ferrite_075_percent_line
-best_filler, result = find_best_filler(results_points_dict, line, dilution)
-plot_line_points(result[0], result[1], "kD-", 15)
-print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
-
-dilution = 30
-ferrite = 7.5
-line = ferrite_075_percent_line
-best_filler, result = find_best_filler(results_points_dict, line, dilution)
-plot_line_points(result[0], result[1], "kD-", 15)
-print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
-
-dilution = 25
-ferrite = 5
-line = ferrite_5_percent_line
-best_filler, result = find_best_filler(results_points_dict, line, dilution)
-plot_line_points(result[0], result[1], "kD-", 15)
-print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
-
-dilution = 30
-ferrite = 5
-line = ferrite_5_percent_line
-best_filler, result = find_best_filler(results_points_dict, line, dilution)
-plot_line_points(result[0], result[1], "kD-", 15)
-print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
 
+# the phase regions of the diagram, every region is a list of polygons, they
+# share their borders and tile the range Cr-equivalent 0...36, Ni-equivalent 0...28
+schaeffler_regions = {
+    "A": [[[0, 28], [0, 24], [17.8, 10.4], [20, 12.9], [23.2, 16.0], [28, 21.0], [32, 25.2], [34.4, 28]]],
+    "A+M": [[[0, 24], [0, 16], [4, 13], [8, 10.3], [10, 9.1], [12, 8.0], [12.6, 7.9], [14, 8.1],
+             [14.4, 8.3], [16, 9.1], [17.8, 10.4]]],
+    "M": [[[0, 16], [0, 7.7], [2.4, 0], [6.4, 0], [14.4, 8.3], [14, 8.1], [12.6, 7.9], [12, 8.0],
+           [10, 9.1], [8, 10.3], [4, 13]]],
+    "M+F": [[[0, 0], [2.4, 0], [0, 7.7]],
+            [[6.4, 0], [14.8, 0], [26.8, 4.6], [22.7, 6.2], [22.7, 6.0], [19, 5.2], [14.4, 8.3]]],
+    "A+M+F": [[[14.4, 8.3], [19, 5.2], [22.7, 6.0], [22.7, 6.2], [21, 7.7], [19, 9.2], [17.8, 10.4],
+               [16, 9.1]]],
+    "A+F": [[[17.8, 10.4], [19, 9.2], [21, 7.7], [22.7, 6.2], [26.8, 4.6], [36, 8], [36, 28], [34.4, 28],
+             [32, 25.2], [28, 21.0], [23.2, 16.0], [20, 12.9]]],
+    "F": [[[14.8, 0], [36, 0], [36, 8], [26.8, 4.6]]],
+}
+
+register_diagram(ConstitutionDiagram(
+    "Schaeffler",
+    {"Cr": 1, "Mo": 1, "Si": 1.5, "Nb": 0.5},
+    {"Ni": 1, "C": 30, "Mn": 0.5},
+    {0: ferrite_0_percent_line, 2.5: ferrite_025_percent_line, 5: ferrite_5_percent_line,
+     7.5: ferrite_075_percent_line, 10: ferrite_10_percent_line, 15: ferrite_15_percent_line,
+     20: ferrite_20_percent_line, 40: ferrite_40_percent_line},
+    {"s_curve_center": s_curve_center, "s_curve_left_border": s_curve_left_border,
+     "s_curve_right_border": s_curve_right_border},
+    cr_range=(0, 36), ni_range=(0, 28), ferrite_unit="%", regions=schaeffler_regions))
+
+# DeLong diagram, the nitrogen term is added to the Ni-equivalent. The ferrite
+# number lines are the straight lines of the usual linear approximation
+# FN = 3.34 * Cr_eq - 2.46 * Ni_eq - 28.6 over the range of the diagram;
+# replace them with a digitization of your own chart if you need more.
+register_diagram(ConstitutionDiagram(
+    "DeLong",
+    {"Cr": 1, "Mo": 1, "Si": 1.5, "Nb": 0.5},
+    {"Ni": 1, "C": 30, "N": 30, "Mn": 0.5},
+    {fn: straight_line([16.0, (3.34 * 16.0 - 28.6 - fn) / 2.46],
+                       [27.0, (3.34 * 27.0 - 28.6 - fn) / 2.46])
+     for fn in range(0, 20, 2)},
+    cr_range=(16, 27), ni_range=(10, 21), ferrite_unit="FN"))
+
+# WRC-1992 diagram with Cu and N in the Ni-equivalent, the fan of ferrite
+# number lines is approximated by straight lines between their crossings
+# with Ni_eq = 9 and Ni_eq = 18 (read off the published diagram)
+_wrc1992_fn_lines = {0: (16.9, 25.3), 2: (17.3, 26.0), 4: (17.6, 26.6), 6: (17.9, 27.2),
+                     8: (18.2, 27.8), 10: (18.5, 28.4), 12: (18.8, 29.0), 14: (19.1, 29.6),
+                     16: (19.3, 30.1), 18: (19.6, 30.6)}
+register_diagram(ConstitutionDiagram(
+    "WRC-1992",
+    {"Cr": 1, "Mo": 1, "Nb": 0.7},
+    {"Ni": 1, "C": 35, "N": 20, "Cu": 0.25},
+    {fn: straight_line([cr_low, 9.0], [cr_high, 18.0])
+     for fn, (cr_low, cr_high) in _wrc1992_fn_lines.items()},
+    cr_range=(17, 31), ni_range=(9, 18), ferrite_unit="FN"))
+
+
+######################### LET'S DEFINE SOME STEELS ############################
+# steels etc...
+steel_14723_avg_dict = {"name":"1.4723","C":0.12,  "Si":0.75, "Mn":1.0, 
+                        "Cr":7.0, "Al":0.75}
+steel_14021_avg_dict = {"name":"1.4021","C":0.205, "Si":0.5, "Mn":0.75, 
+                        "Cr":13.0, "Al":0.0}
+steel_A508_avg_dict = {"name":"A508","C":0.3, "Si":0.4, "Mn":1.35,  
+                        "Cr":0.0, "Mo": 0.1, "Ni": 0.4, "Al":0.0}
+steel_A304L_avg_dict = {"name":"A304L","C":0.03, "Si":1.0, "Mn":2.0,  
+                        "Cr":18.5, "Mo": 0.0, "Ni": 11.0, "Nb":0.01, "Al":0.0}
+
+
+# welding fillers etc
+bohler_Thermanit2509CuT_avg_dict = {"name":"Thermanit2509CuT","C":0.02, 
+                                    "Si":0.35, "Mn":0.9, "Cr":25.5, "Ni":9.5,
+                                    "Mo":3.8, "W":0.6}
+bohler_ThermanitJE308LSi_dict = {"name":"ThermanitJE308LSi","C":0.02, "Si":0.9,
+                                 "Mn":1.7, "Cr":20, "Ni":10}
+bohler_FOXCN2312MoA_dict = {"name":"FOXCN2312MoA","C":0.02, "Si":0.7, "Mn":0.8,
+                            "Cr":23.0, "Ni":12.5, "Mo":2.7}
+bohler_EMK8_dict = {"name":"EMK8","C":0.1, "Si":1.0, "Mn":1.7}
+bohler_UnionIMoMn_dict = {"name":"UnionIMoMn","C":0.09, "Si":0.65, "Mn":1.8, 
+                          "Mo":0.52}
+bohler_UnionICrMo910_dict = {"name":"UnionICrMo910","C":0.07, "Si":0.60, "Mn":1.0, 
+                          "Cr": 2.55, "Mo":1.0}
+bohler_Thermanit1605Mo_dict = {"name":"Thermanit1605Mo","C":0.02, "Si":0.35, 
+                               "Mn":1.3, "Cr": 16, "Ni": 5.5, "Mo": 1.0}
+bohler_CAT430LCbIG_dict = {"name":"CAT430LCbIG","C":0.02, "Si":0.5, "Mn":0.5, 
+                          "Cr": 18, "Nb": 0.24}
+bohler_ThermanitGE316LCryo_dict = {"name":"ThermanitGE316LCryo","C":0.02, 
+                                   "Si":0.35, "Mn":1.8, "Cr": 18.5, "Ni": 12.3,
+                                   "Mo": 2.8}
+filler_308L_dict = {"name":"308L","C":0.04, "Si":1.0, "Mn":1.25, "Cr":19.5, 
+                    "Mo": 0.75, "Ni": 10.5, "Nb":0.0, "Al":0.0}
+
+# all of them, for example for Schaeffler_batch.py
+BASE_METALS = [steel_14723_avg_dict, steel_14021_avg_dict, steel_A508_avg_dict,
+               steel_A304L_avg_dict]
+FILLERS = [bohler_Thermanit2509CuT_avg_dict, bohler_ThermanitJE308LSi_dict,
+           bohler_FOXCN2312MoA_dict, bohler_EMK8_dict, bohler_UnionIMoMn_dict,
+           bohler_UnionICrMo910_dict, bohler_Thermanit1605Mo_dict,
+           bohler_CAT430LCbIG_dict, bohler_ThermanitGE316LCryo_dict, filler_308L_dict]
+
+
+######################### THE DEMO ############################################
+def demo():
+    """The example of the README: weld 1.4021 to 1.4723 and find the best filler."""
+    plt = _pyplot()
+
+    # first we show the background, then we add points etc.
+    plot_background(0.5)
+
+    # we add some points
+    plot_metal_dicts([steel_14021_avg_dict, steel_14723_avg_dict,
+                      bohler_Thermanit2509CuT_avg_dict, bohler_ThermanitJE308LSi_dict,
+                      bohler_FOXCN2312MoA_dict, bohler_EMK8_dict, bohler_UnionIMoMn_dict,
+                      # bohler_UnionICrMo910_dict,
+                      bohler_Thermanit1605Mo_dict, bohler_CAT430LCbIG_dict,
+                      bohler_ThermanitGE316LCryo_dict])
+    # plot_metal_dict(steel_A508_avg_dict, get_value(steel_A508_avg_dict, "name"))
+    # plot_metal_dict(steel_A304L_avg_dict, get_value(steel_A304L_avg_dict, "name"))
+    # plot_metal_dict(filler_308L_dict, get_value(filler_308L_dict, "name"))
+
+
+    # we plot a line between our two metals we want to weld
+    plot_line_dicts(steel_14021_avg_dict, steel_14723_avg_dict, "r-")
+    # plot_line_dicts(steel_A508_avg_dict, steel_A304L_avg_dict, "r-")
+
+    # we zoom into an interesting area of the diagram
+    # maxima are Cr:0-36 and Ni= 0-28
+    Cr_lower_lim = 0
+    Cr_upper_lim = 36
+    Ni_lower_lim = 0
+    Ni_upper_lim = 28
+    x_canvas = 100
+    y_canvas = 150
+    x_lower, y_lower = get_calibration().to_pixels([Cr_lower_lim, Ni_lower_lim])[0]
+    x_upper, y_upper = get_calibration().to_pixels([Cr_upper_lim, Ni_upper_lim])[0]
+    x_lower = x_lower - x_canvas
+    y_lower = y_lower + y_canvas
+    plt.xlim([x_lower,x_upper])
+    plt.ylim([y_lower,y_upper])
+
+
+    # we want to store results, one array row per filler
+    results_points_dict = WeldResultStore()
+
+    # let's try the first filler
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_Thermanit2509CuT_avg_dict)
+    results_points_dict[get_value(bohler_Thermanit2509CuT_avg_dict, "name")] = result
+
+    # let's try another filler bohler_ThermanitJE308LSi
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_ThermanitJE308LSi_dict)
+    results_points_dict[get_value(bohler_ThermanitJE308LSi_dict, "name")] = result
+
+    # let's try another filler bohler_UnionIMoMn
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_UnionIMoMn_dict)
+    results_points_dict[get_value(bohler_UnionIMoMn_dict, "name")] = result
+
+    # let's try another filler bohler_EMK8
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_EMK8_dict)
+    results_points_dict[get_value(bohler_EMK8_dict, "name")] = result
+
+    # let's try another filler bohler_Thermanit1605Mo
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_Thermanit1605Mo_dict)
+    results_points_dict[get_value(bohler_Thermanit1605Mo_dict, "name")] = result
+
+    # let's try another filler bohler_CAT430LCbIG
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_CAT430LCbIG_dict)
+    results_points_dict[get_value(bohler_CAT430LCbIG_dict, "name")] = result
+
+    # let's try another filler bohler_ThermanitGE316LCryo
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_ThermanitGE316LCryo_dict)
+    results_points_dict[get_value(bohler_ThermanitGE316LCryo_dict, "name")] = result
+
+    # one last try
+    result = weld_steels_filler(steel_14021_avg_dict, steel_14723_avg_dict, bohler_FOXCN2312MoA_dict)
+    results_points_dict[get_value(bohler_FOXCN2312MoA_dict, "name")] = result
+
+
+
+    # # first pass
+    # result1 = weld_steels_filler(steel_A304L_avg_dict, steel_A508_avg_dict, filler_308L_dict) # mind the order!!!
+    # results_points_dict[get_value(filler_308L_dict, "name")] = result1
+    # # second pass
+    # result2 = weld_steels_filler(steel_A304L_avg_dict, steel_A304L_avg_dict, filler_308L_dict) # mind the order!!!
+    # results_points_dict[get_value(filler_308L_dict, "name")] = result2
+    # # third pass
+    # result3 = weld_steels_filler(steel_A508_avg_dict, steel_A508_avg_dict, filler_308L_dict) # mind the order!!!
+    # results_points_dict[get_value(filler_308L_dict, "name")] = result3
+    # # fourth pass
+    # result3 = weld_steels_filler(steel_A304L_avg_dict, steel_A508_avg_dict, filler_308L_dict) # mind the order!!!
+    # results_points_dict[get_value(filler_308L_dict, "name")] = result3
+
+
+    # we show the S-curve and the iso-ferrite lines
+    plot_curve_points_list(s_curve_center, "rX-")
+    plot_curve_points_list(s_curve_left_border, "bX-")
+    plot_curve_points_list(s_curve_right_border, "cX-")
+    plot_curve_points_list(ferrite_0_percent_line, "b-")
+    plot_curve_points_list(ferrite_5_percent_line, "r-")
+    plot_curve_points_list(ferrite_10_percent_line, "g-")
+    plot_curve_points_list(ferrite_20_percent_line, "c-")
+    plot_curve_points_list(ferrite_40_percent_line, "y-")
+    plot_curve_points_list(ferrite_075_percent_line, "k--")
+    plot_curve_points_list(ferrite_025_percent_line, "k--")
+    plot_curve_points_list(ferrite_15_percent_line, "k--")
+
+
+    # let's find the best filler in our ensemble of fillers for the two steels
+    dilution = 25
+    ferrite = 10
+    line = ferrite_10_percent_line
+    best_filler, result = find_best_filler(results_points_dict, line, dilution)
+    plot_line_points(result[0], result[1], "kD-", 15)
+    print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
+
+    dilution = 30
+    ferrite = 10
+    line = ferrite_10_percent_line
+    best_filler, result = find_best_filler(results_points_dict, line, dilution)
+    plot_line_points(result[0], result[1], "kD-", 15)
+    print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
+
+    dilution = 25
+    ferrite = 7.5
+    line = ferrite_075_percent_line
+    best_filler, result = find_best_filler(results_points_dict, line, dilution)
+    plot_line_points(result[0], result[1], "kD-", 15)
+    print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
+
+    dilution = 30
+    ferrite = 7.5
+    line = ferrite_075_percent_line
+    best_filler, result = find_best_filler(results_points_dict, line, dilution)
+    plot_line_points(result[0], result[1], "kD-", 15)
+    print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
+
+    dilution = 25
+    ferrite = 5
+    line = ferrite_5_percent_line
+    best_filler, result = find_best_filler(results_points_dict, line, dilution)
+    plot_line_points(result[0], result[1], "kD-", 15)
+    print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
+
+    dilution = 30
+    ferrite = 5
+    line = ferrite_5_percent_line
+    best_filler, result = find_best_filler(results_points_dict, line, dilution)
+    plot_line_points(result[0], result[1], "kD-", 15)
+    print(f"ferrite_percentage = {ferrite}, {dilution = }, {best_filler = }")
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,322 @@
+"""
+Report mode of Schaeffler_diagram_find_filler_material: one annotated
+Schaeffler diagram per joint (pair of base metals), for example for weld
+procedure qualification records. The background image is decoded and the
+S-curve and the iso-ferrite lines are drawn only once, into a template image.
+Every joint is drawn as an overlay on a copy of the template, in several
+processes, and saved as PNG or PDF.
+
+The joints are read from a job file like the one of Schaeffler_batch.py; a
+job may name its filler (a column or key "filler"), otherwise the best filler
+for the ferrite line and the first dilution of the job is shown:
+
+    base1,base2,dilutions,ferrite,filler
+    1.4021,1.4723,25;30,10,
+    A508,A304L,30,5,308L
+
+Example:
+
+    python Schaeffler_report.py jobs.csv --output-dir report --format pdf --workers 4
+
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import Schaeffler_diagram_find_filler_material as schaeffler
+from Schaeffler_batch import chunks, file_format_of, load_metals, read_jobs
+
+
+# the static curves of the template, in the styles of the demo
+STATIC_CURVES = [("s_curve_center", "rX-"), ("s_curve_left_border", "bX-"), ("s_curve_right_border", "cX-"),
+                 (0, "b-"), (5, "r-"), (10, "g-"), (20, "c-"), (40, "y-"),
+                 (7.5, "k--"), (2.5, "k--"), (15, "k--")]
+
+
+# reports are only written to files, so no window is ever needed
+MATPLOTLIB_BACKEND = "Agg"
+
+
+class ReportTemplate:
+    """
+    The static part of every report figure: the background image and the
+    curves of the diagram, rendered once into an RGBA image, together with
+    the position and the limits of its axes, so overlays can be drawn on top
+    at the right places.
+
+    Attributes
+    ----------
+    image : TYPE numpy array
+        DESCRIPTION. the rendered template, shape (height, width, 4), uint8
+    position : TYPE list
+        DESCRIPTION. [left, bottom, width, height] of the axes in the figure
+    xlim : TYPE tuple
+        DESCRIPTION. limits of the axes in pixels of the background image
+    ylim : TYPE tuple
+        DESCRIPTION. limits of the axes in pixels of the background image
+    figsize : TYPE tuple
+        DESCRIPTION. size of the figure in inches
+    dpi : TYPE float
+        DESCRIPTION. dots per inch of the figure
+
+    """
+
+    def __init__(self, image, position, xlim, ylim, figsize, dpi):
+        self.image = image
+        self.position = position
+        self.xlim = xlim
+        self.ylim = ylim
+        self.figsize = figsize
+        self.dpi = dpi
+
+    @classmethod
+    def render(cls, diagram="Schaeffler", alpha=0.5, figsize=(15, 9), dpi=100):
+        """
+        Draws the background and the STATIC_CURVES of the diagram like the
+        demo does (plot_background, plot_curve_points_list and its zoom) and
+        keeps the result as an image.
+        """
+        plt = schaeffler._pyplot(MATPLOTLIB_BACKEND)
+        diagram = schaeffler.get_diagram(diagram)
+        figure = plt.figure(figsize=figsize, dpi=dpi)
+        axes = figure.add_subplot()
+        axes.imshow(plt.imread(schaeffler.get_calibration().image), alpha=alpha)
+        axes.axis("off")
+        for key, style in STATIC_CURVES:
+            x_coords, y_coords = schaeffler.transform_points2(diagram.curve(key))
+            axes.plot(x_coords, y_coords, style, markersize=6)
+        # the zoom of the demo, the whole diagram and some room for the texts
+        x_lower, y_lower = schaeffler.get_calibration().to_pixels([diagram.cr_range[0], diagram.ni_range[0]])[0]
+        x_upper, y_upper = schaeffler.get_calibration().to_pixels([diagram.cr_range[1], diagram.ni_range[1]])[0]
+        axes.set_xlim([x_lower - 100, x_upper])
+        axes.set_ylim([y_lower + 150, y_upper])
+        figure.tight_layout()
+        figure.canvas.draw()
+        template = cls(np.asarray(figure.canvas.buffer_rgba()).copy(), list(axes.get_position().bounds),
+                       axes.get_xlim(), axes.get_ylim(), figsize, dpi)
+        plt.close(figure)
+        return template
+
+    def figure(self):
+        """
+        A figure showing the template pixel by pixel, and transparent axes
+        at the position of the template's axes for the overlays.
+        """
+        plt = schaeffler._pyplot(MATPLOTLIB_BACKEND)
+        figure = plt.figure(figsize=self.figsize, dpi=self.dpi)
+        # below the axes, a figure draws its images after axes of the same zorder
+        figure.figimage(self.image, origin="upper", zorder=-1)
+        axes = figure.add_axes(self.position)
+        self.reset(axes)
+        return figure, axes
+
+    def reset(self, axes):
+        """Removes the overlay of the last joint from the axes."""
+        axes.cla()
+        axes.set_xlim(self.xlim)
+        axes.set_ylim(self.ylim)
+        axes.axis("off")
+        axes.patch.set_visible(False)
+
+
+def choose_filler(job, filler_dicts, diagram):
+    """
+    The metal_dict of the filler of a job: the one it names, or the best one
+    of filler_dicts for its ferrite line and first dilution.
+    """
+    filler = job.get("filler")
+    if filler:
+        if isinstance(filler, dict):
+            return filler
+        for filler_dict in filler_dicts:
+            if schaeffler.get_value(filler_dict, "name") == filler:
+                return filler_dict
+        raise KeyError(f"unknown filler {filler!r}")
+    results_dict = schaeffler.weld_steels_fillers(job["base1"], job["base2"], filler_dicts)
+    best_filler, _ = schaeffler.find_best_filler(results_dict, diagram.curve(job["ferrite"]), job["dilutions"][0])
+    return filler_dicts[results_dict.index[best_filler]]
+
+
+def draw_joint(job, filler_dict, diagram, axes):
+    """
+    Draws the overlay of a joint like the demo: the base metals and the
+    filler, the line between the base metals, the dilution points and the
+    distance of the weld metal to the ferrite line for every dilution.
+    """
+    plt = schaeffler._pyplot(MATPLOTLIB_BACKEND)
+    plt.sca(axes)
+    base1, base2 = job["base1"], job["base2"]
+    schaeffler.plot_metal_dicts([base1, base2, filler_dict])
+    schaeffler.plot_line_dicts(base1, base2, "r-")
+    weld_result = schaeffler.compute_weld_steels_filler(base1, base2, filler_dict)
+    schaeffler.render_weld_result(weld_result)
+    curve = diagram.curve(job["ferrite"])
+    results_points = weld_result.points_list()
+    lines = []
+    for dilution in job["dilutions"]:
+        point = schaeffler.dilution_point(results_points, dilution)
+        result = schaeffler.find_min_distance_point_to_curve(curve, point)
+        schaeffler.plot_line_points(result[0], result[1], "kD-", 15)
+        lines.append(f"{dilution:g}% dilution: {result[2]:.2f} from the "
+                     f"{job['ferrite']:g}{diagram.ferrite_unit} line")
+    axes.text(0.01, 0.99, "\n".join([f"{schaeffler.get_value(base1, 'name')} + "
+                                     f"{schaeffler.get_value(base2, 'name')}, filler "
+                                     f"{schaeffler.get_value(filler_dict, 'name')}"] + lines),
+              transform=axes.transAxes, verticalalignment="top", fontsize=12,
+              bbox={"facecolor": "white", "alpha": 0.8})
+
+
+def file_name(number, job, file_format):
+    """The file name of the figure of a job, for example 0003_1.4021_1.4723.pdf."""
+    names = [schaeffler.get_value(job[key], "name") for key in ("base1", "base2")]
+    return "_".join([f"{number:04d}"] + [re.sub(r"[^\w.+-]", "-", name) for name in names]) + f".{file_format}"
+
+
+# the state of a worker process, set by _start_worker
+_worker = {}
+
+
+def _start_worker(template, filler_dicts, diagram, output_dir, file_format):
+    figure, axes = template.figure()
+    _worker.update(template=template, filler_dicts=filler_dicts, diagram=schaeffler.get_diagram(diagram),
+                   output_dir=output_dir, file_format=file_format, figure=figure, axes=axes)
+
+
+def _render_job(numbered_job):
+    number, job = numbered_job
+    template, axes = _worker["template"], _worker["axes"]
+    filler_dict = choose_filler(job, _worker["filler_dicts"], _worker["diagram"])
+    template.reset(axes)
+    draw_joint(job, filler_dict, _worker["diagram"], axes)
+    path = os.path.join(_worker["output_dir"], file_name(number, job, _worker["file_format"]))
+    _worker["figure"].savefig(path, dpi=template.dpi)
+    return path
+
+
+def render_report(jobs, filler_dicts, output_dir, file_format="png", diagram="Schaeffler", workers=None,
+                  template=None, progress=None):
+    """
+    Renders one figure per job into output_dir.
+
+    Parameters
+    ----------
+    jobs : TYPE iterable
+        DESCRIPTION. jobs as yielded by read_jobs, base1 and base2 (and the
+                     filler, if any) already metal_dicts
+    filler_dicts : TYPE list
+        DESCRIPTION. the metal_dicts of the fillers the best one is chosen from
+    output_dir : TYPE string
+        DESCRIPTION. directory of the figures, created if needed
+    file_format : TYPE string
+        DESCRIPTION. "png" or "pdf"
+    diagram : TYPE string
+        DESCRIPTION. registered name of the diagram
+    workers : TYPE int
+        DESCRIPTION. number of processes, None for one per CPU, 1 renders
+                     in this process
+    template : TYPE ReportTemplate
+        DESCRIPTION. optional, the template, rendered here if None
+    progress : TYPE function
+        DESCRIPTION. optional, called with the number of figures written so far
+
+    Returns
+    -------
+    TYPE list
+        DESCRIPTION. the paths of the figures, in the order of the jobs
+
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if template is None:
+        with schaeffler.INSTRUMENTATION.stage("template"):
+            template = ReportTemplate.render(diagram)
+    worker_arguments = (template, filler_dicts, diagram, output_dir, file_format)
+    numbered_jobs = enumerate(jobs)
+    paths = []
+    with schaeffler.INSTRUMENTATION.stage("rendering"):
+        if workers == 1:
+            _start_worker(*worker_arguments)
+            for numbered_job in numbered_jobs:
+                paths.append(_render_job(numbered_job))
+                if progress is not None:
+                    progress(len(paths))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_start_worker, initargs=worker_arguments) as executor:
+                # a bounded number of jobs is on its way, so long job files do not fill the memory
+                for chunk in chunks(numbered_jobs, 256):
+                    for path in executor.map(_render_job, chunk, chunksize=8):
+                        paths.append(path)
+                        if progress is not None:
+                            progress(len(paths))
+    schaeffler.INSTRUMENTATION.count("figures", len(paths))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render one annotated Schaeffler diagram per joint.")
+    parser.add_argument("jobs", help="job file (.csv or .jsonl), - for stdin")
+    parser.add_argument("-o", "--output-dir", default="report", help="directory of the figures, default report")
+    parser.add_argument("--format", choices=["png", "pdf"], default="png", help="file format, default png")
+    parser.add_argument("--jobs-format", choices=["csv", "jsonl"], help="format of the job file")
+    parser.add_argument("--bases", help="base metals (.json, .jsonl or .csv), in addition to the built-in ones")
+    parser.add_argument("--fillers", help="fillers (.json, .jsonl or .csv) instead of the built-in ones")
+    parser.add_argument("--database", help="AlloyDatabase file with the base metals and fillers")
+    parser.add_argument("--workers", type=int, help="number of processes, default one per CPU")
+    parser.add_argument("--dpi", type=float, default=100, help="dots per inch, default 100")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress report")
+    parser.add_argument("--stats", help="write stage times and counters to this file (.json or text), - for stderr")
+    args = parser.parse_args(argv)
+    if args.stats is not None:
+        schaeffler.INSTRUMENTATION.enable()
+
+    base_metals, filler_dicts = load_metals(args.bases, args.fillers, args.database)
+    diagram = schaeffler.get_diagram()
+
+    def resolved(jobs):
+        for number, job in enumerate(jobs):
+            if job["ferrite"] not in diagram.iso_lines:
+                raise ValueError(f"job {number}: no {job['ferrite']:g}{diagram.ferrite_unit} line in the "
+                                 f"{diagram.name} diagram, available are {sorted(diagram.iso_lines)}")
+            for key in ("base1", "base2"):
+                if not isinstance(job[key], dict):
+                    if job[key] not in base_metals:
+                        raise KeyError(f"job {number}: unknown base metal {job[key]!r}")
+                    job[key] = base_metals[job[key]]
+            yield job
+
+    start = time.perf_counter()
+
+    def progress(done):
+        if not args.quiet:
+            elapsed = time.perf_counter() - start
+            print(f"\r{done} figures, {done / elapsed:.1f} figures/s", end="", file=sys.stderr, flush=True)
+
+    jobs_file = sys.stdin if args.jobs == "-" else open(args.jobs, newline="")
+    try:
+        with schaeffler.INSTRUMENTATION.stage("template"):
+            template = ReportTemplate.render(dpi=args.dpi)
+        paths = render_report(resolved(read_jobs(jobs_file, file_format_of(args.jobs, args.jobs_format))),
+                              filler_dicts, args.output_dir, args.format, workers=args.workers,
+                              template=template, progress=progress)
+    except (KeyError, ValueError) as error:
+        # unknown base metal or filler, or ferrite target without an iso-ferrite line
+        parser.error(error.args[0] if error.args else str(error))
+    finally:
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+    if not args.quiet:
+        elapsed = time.perf_counter() - start
+        print(f"\r{len(paths)} figures in {elapsed:.2f} s, {len(paths) / max(elapsed, 1e-9):.1f} figures/s",
+              file=sys.stderr)
+    if args.stats is not None:
+        schaeffler.INSTRUMENTATION.disable()
+        schaeffler.INSTRUMENTATION.dump(None if args.stats == "-" else args.stats)
+
+
+if __name__ == "__main__":
+    main()
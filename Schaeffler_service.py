@@ -0,0 +1,275 @@
+"""
+Local HTTP service of Schaeffler_diagram_find_filler_material. The catalog,
+the equivalents of all metals and the curves are loaded once and kept in
+memory, the results_dict of every pair of base metals is calculated once and
+reused, so a request is answered in about a millisecond. The service only
+listens on 127.0.0.1.
+
+    python Schaeffler_service.py --port 8765
+
+Requests (GET, the answer is JSON):
+
+    /best_filler?base1=1.4021&base2=1.4723&dilution=25&ferrite=7.5
+    /best_filler?base1=1.4021&base2=1.4723&dilution=25&curve=s_curve_center
+    /metals
+    /health
+
+With --query the script asks a running service instead, for testing:
+
+    python Schaeffler_service.py --query "/best_filler?base1=1.4021&base2=1.4723&dilution=25&ferrite=7.5"
+
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import Schaeffler_diagram_find_filler_material as schaeffler
+
+
+class FillerService:
+    """
+    Answers filler questions from memory. Identical requests that arrive while
+    the answer is being calculated wait for the same calculation.
+
+    Parameters
+    ----------
+    base_metals : TYPE list
+        DESCRIPTION. metal_dicts of the base metals requests can refer to
+    filler_dicts : TYPE list
+        DESCRIPTION. metal_dicts of the fillers find_best_filler chooses from
+    diagram : TYPE ConstitutionDiagram or string
+        DESCRIPTION. the diagram (or its registered name) of the curves
+    max_cached : TYPE int
+        DESCRIPTION. number of answers kept, the oldest are dropped first
+
+    """
+
+    def __init__(self, base_metals, filler_dicts, diagram="Schaeffler", max_cached=100000):
+        self.diagram = schaeffler.get_diagram(diagram)
+        self.metals = {schaeffler.get_value(metal_dict, "name"): metal_dict
+                       for metal_dict in list(base_metals) + list(filler_dicts)}
+        self.filler_dicts = list(filler_dicts)
+        self.filler_names = [schaeffler.get_value(filler_dict, "name") for filler_dict in self.filler_dicts]
+        # the equivalents of the diagram, its curves are measured in them
+        self.filler_points = self.diagram.equivalent_points(schaeffler.AlloyCatalog.from_dicts(self.filler_dicts))
+        self.max_cached = max_cached
+        self.results_dicts = {}
+        self.answers = {}
+        self.pending = {}
+        self.requests = 0
+        self.calculations = 0
+
+    def results_dict(self, base1, base2):
+        """
+        The results_dict of weld_steels_fillers for a pair, but with the
+        equivalents of the service's diagram, calculated once. Both orders
+        of a pair share it, so the answer does not depend on the order.
+        """
+        key = tuple(sorted((base1, base2)))
+        try:
+            return self.results_dicts[key]
+        except KeyError:
+            point1, point2 = (self.diagram.equivalents(self._metal(name)) for name in key)
+            mix50_point = schaeffler.mix_points(point1, point2, 50)
+            points = schaeffler.mix_point_arrays(mix50_point, self.filler_points[:, None, :],
+                                                 schaeffler.RESULT_DILUTIONS)
+            results_dict = schaeffler.WeldResultStore(capacity=len(self.filler_names))
+            for name, results_points in zip(self.filler_names, points):
+                results_dict[name] = results_points
+            self.results_dicts[key] = results_dict
+            return results_dict
+
+    def _metal(self, name):
+        try:
+            return self.metals[name]
+        except KeyError:
+            raise KeyError(f"unknown metal {name!r}") from None
+
+    def best_filler(self, base1, base2, dilution, curve_key):
+        """
+        find_best_filler for a pair of base metals (names), a dilution and a
+        curve of the diagram (an iso-ferrite line or a boundary name).
+        """
+        best_key, result = schaeffler.find_best_filler(self.results_dict(base1, base2),
+                                                       self.diagram.curve(curve_key), dilution)
+        return {"base1": base1, "base2": base2, "dilution": dilution, "curve": curve_key,
+                "best_filler": best_key, "point": [float(value) for value in result[0]],
+                "curve_point": [float(value) for value in result[1]], "distance": float(result[2])}
+
+    async def answer(self, base1, base2, dilution, curve_key):
+        """
+        The answer of best_filler, from the cache or calculated once in a
+        worker thread, the event loop keeps serving other requests meanwhile.
+        """
+        self.requests += 1
+        key = (base1, base2, dilution, curve_key)
+        try:
+            return self.answers[key]
+        except KeyError:
+            pass
+        future = self.pending.get(key)
+        if future is not None:
+            return await future
+        loop = asyncio.get_running_loop()
+        future = self.pending[key] = loop.create_future()
+        try:
+            self.calculations += 1
+            answer = await loop.run_in_executor(None, self.best_filler, base1, base2, dilution, curve_key)
+        except Exception as error:
+            future.set_exception(error)
+            # marks the error as retrieved, in case nobody else waits for it
+            future.exception()
+            raise
+        else:
+            if len(self.answers) >= self.max_cached:
+                del self.answers[next(iter(self.answers))]
+            self.answers[key] = answer
+            future.set_result(answer)
+            return answer
+        finally:
+            # a cancelled calculation cancels the requests waiting for it
+            if not future.done():
+                future.cancel()
+            del self.pending[key]
+
+
+def _curve_key(query, diagram):
+    if "curve" in query:
+        if query["curve"] not in diagram.boundaries:
+            raise KeyError(f"no curve {query['curve']!r}, available are {sorted(diagram.boundaries)}, "
+                           f"iso-lines with ferrite={sorted(diagram.iso_lines)}")
+        return query["curve"]
+    ferrite = float(query["ferrite"])
+    if ferrite not in diagram.iso_lines:
+        raise KeyError(f"no {ferrite:g}{diagram.ferrite_unit} line, available are {sorted(diagram.iso_lines)}")
+    return ferrite
+
+
+def _dilution(query):
+    dilution = float(query["dilution"])
+    if not (math.isfinite(dilution) and 0 <= dilution <= 100):
+        raise ValueError(f"dilution must be from 0 to 100 %, not {query['dilution']}")
+    return dilution
+
+
+async def handle_request(service, method, target):
+    """Returns (status, answer) of a request."""
+    if method != "GET":
+        return 405, {"error": "only GET is supported"}
+    url = urlsplit(target)
+    query = dict(parse_qsl(url.query))
+    if url.path == "/health":
+        return 200, {"status": "ok", "requests": service.requests, "calculations": service.calculations,
+                     "cached": len(service.answers)}
+    if url.path == "/metals":
+        return 200, {"metals": sorted(service.metals),
+                     "fillers": service.filler_names}
+    if url.path == "/best_filler":
+        missing = [name for name in ("base1", "base2", "dilution") if name not in query]
+        if missing or ("ferrite" not in query and "curve" not in query):
+            return 400, {"error": f"missing parameters {missing or ['ferrite or curve']}"}
+        try:
+            curve_key = _curve_key(query, service.diagram)
+            answer = await service.answer(query["base1"], query["base2"], _dilution(query), curve_key)
+        except KeyError as error:
+            return 400, {"error": error.args[0]}
+        except ValueError as error:
+            return 400, {"error": str(error)}
+        return 200, answer
+    return 404, {"error": f"unknown path {url.path}"}
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+async def serve_connection(service, reader, writer):
+    """Answers the requests of one connection (HTTP/1.1, keep-alive)."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode("latin-1").split()
+            keep_alive = version == "HTTP/1.1"
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.strip().lower() == "connection":
+                    keep_alive = value.strip().lower() == "keep-alive"
+            status, answer = await handle_request(service, method, target)
+            body = json.dumps(answer).encode()
+            writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                         f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service, port=8765):
+    """Runs the service on 127.0.0.1:port until it is cancelled."""
+    server = await asyncio.start_server(lambda reader, writer: serve_connection(service, reader, writer),
+                                        "127.0.0.1", port)
+    async with server:
+        await server.serve_forever()
+
+
+async def query(path, port=8765, repeat=1):
+    """
+    Asks a running service on 127.0.0.1:port, repeat times over one
+    connection. Returns the last answer and the mean time per request in ms.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            answer = json.loads(await reader.readexactly(length))
+        return answer, (time.perf_counter() - start) / repeat * 1000
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service for filler lookups.")
+    parser.add_argument("--port", type=int, default=8765, help="port on 127.0.0.1, default 8765")
+    parser.add_argument("--diagram", default="Schaeffler", help="registered diagram, default Schaeffler")
+    parser.add_argument("--query", help="ask a running service for this path instead")
+    parser.add_argument("--repeat", type=int, default=1, help="with --query, number of requests")
+    args = parser.parse_args(argv)
+    if args.query is not None:
+        answer, milliseconds = asyncio.run(query(args.query, args.port, args.repeat))
+        print(json.dumps(answer, indent=2))
+        print(f"{milliseconds:.3f} ms per request", file=sys.stderr)
+        return
+    service = FillerService(schaeffler.BASE_METALS, schaeffler.FILLERS, args.diagram)
+    print(f"serving on http://127.0.0.1:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(serve(service, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()